@@ -1,15 +1,47 @@
 import streamlit as st
-from st_screen_stats import ScreenData
 import logging
 import os
 import uuid
-import requests
+import hashlib
+import importlib
+import threading
+import sqlite3
+import contextlib
+import collections
+import concurrent.futures
+import copy
+import queue
+import random
+import base64
+import io
+import gzip
+import re
+import bisect
+import abc
+import logging.handlers
 import json
 import time
-import pandas as pd
 from streamlit import Page
+from streamlit.runtime.scriptrunner import get_script_run_ctx
 from datetime import datetime
 
+# Lazy imports (무거운 의존성은 첫 사용 시점에 import → 콜드 스타트 단축)
+class LazyModule:
+    """Module proxy that imports the real module on first attribute access"""
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attr):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return getattr(self._module, attr)
+
+requests = LazyModule("requests")
+np = LazyModule("numpy")
+streamlit_mermaid = LazyModule("streamlit_mermaid")
+
 # Configuration class for app settings
 class Config:
     """Application configuration settings"""
@@ -29,15 +61,152 @@ class Config:
         except Exception:
             self.backend_url = "http://127.0.0.1:8000"
 
-# Logging setup
-def setup_logging():
-    """Configure logging for the application"""
-    logging.basicConfig(
-        level=logging.INFO,
-        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+        # 중복 제출 병합 (idempotency key 유효 시간, 초)
+        self.idempotency_window = int(self._get_setting("IDEMPOTENCY_WINDOW_SECONDS", 600))
+
+        # 서버 측 세션 저장소 ("sqlite" 또는 "none")
+        self.session_store_backend = self._get_setting("SESSION_STORE_BACKEND", "sqlite")
+        self.session_store_path = self._get_setting("SESSION_STORE_PATH", os.path.join(".mystudy", "sessions.sqlite3"))
+        self.history_page_size = int(self._get_setting("HISTORY_PAGE_SIZE", 20))
+
+        # task 완료 여부 write-behind 큐 설정
+        self.task_write_batch_window = float(self._get_setting("TASK_WRITE_BATCH_WINDOW", 0.3))
+        self.task_write_max_attempts = int(self._get_setting("TASK_WRITE_MAX_ATTEMPTS", 3))
+        self.task_write_concurrency = int(self._get_setting("TASK_WRITE_CONCURRENCY", 4))
+
+        # 프로세스당 동시 /chat/stream 수 제한 및 대기열
+        self.max_concurrent_streams = int(self._get_setting("MAX_CONCURRENT_STREAMS", 8))
+        self.stream_queue_max = int(self._get_setting("STREAM_QUEUE_MAX", 32))
+        self.stream_queue_timeout = float(self._get_setting("STREAM_QUEUE_TIMEOUT", 120))
+
+        # 백엔드 circuit breaker 및 헬스 체크 설정
+        self.breaker_options = {
+            "failure_threshold": int(self._get_setting("BREAKER_FAILURE_THRESHOLD", 5)),
+            "slow_call_seconds": float(self._get_setting("BREAKER_SLOW_CALL_SECONDS", 30)),
+            "probe_interval": float(self._get_setting("HEALTH_PROBE_INTERVAL", 10)),
+            "health_path": self._get_setting("HEALTH_PATH", "/health"),
+        }
+
+        # 로깅 설정 (큐 기반 비동기 JSON 로깅)
+        self.log_level = str(self._get_setting("LOG_LEVEL", "INFO")).upper()
+        self.log_queue_size = int(self._get_setting("LOG_QUEUE_SIZE", 10000))
+        self.log_max_body_chars = int(self._get_setting("LOG_MAX_BODY_CHARS", 500))
+        self.log_body_sample_rate = float(self._get_setting("LOG_BODY_SAMPLE_RATE", 1.0))
+
+        # 채팅 렌더 캐시 설정
+        self.render_cache_max_bytes = int(self._get_setting("RENDER_CACHE_MAX_BYTES", 8 * 1024 * 1024))
+
+        # /chat/stream 기록/재생 (성능 회귀 테스트용, 기본 비활성)
+        self.stream_record_dir = self._get_setting("STREAM_RECORD_DIR")
+        self.stream_replay_file = self._get_setting("STREAM_REPLAY_FILE")
+        self.stream_replay_speed = float(self._get_setting("STREAM_REPLAY_SPEED", 1.0))
+
+    @staticmethod
+    def _get_setting(name, default=None):
+        """Read a setting from st.secrets, then environment variables, then fall back to default"""
+        try:
+            value = st.secrets.get(name)
+        except Exception:
+            value = None
+        if value is None:
+            value = os.environ.get(name)
+        return default if value in (None, "") else value
+
+# Logging setup (큐 기반 비동기 JSON 로깅: 렌더 스레드에서는 I/O 하지 않음)
+class JsonFormatter(logging.Formatter):
+    """Formats a record as one JSON object per line"""
+
+    FIELDS = ("event", "session_id", "request_id", "duration_ms", "ttfb_ms", "queue_wait_ms", "body", "body_len", "body_sampled")
+
+    def format(self, record):
+        entry = {
+            "ts": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for field in self.FIELDS:
+            value = getattr(record, field, None)
+            if value is not None:
+                entry[field] = value
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """Queue handler that truncates or samples message bodies and drops records when the buffer is full"""
+
+    def __init__(self, log_queue, max_body_chars, body_sample_rate):
+        super().__init__(log_queue)
+        self.max_body_chars = max_body_chars
+        self.body_sample_rate = body_sample_rate
+        self.dropped = 0
+
+    def prepare(self, record):
+        # 렌더 스레드에서는 메시지 병합과 본문 자르기만 수행 (포맷/출력은 listener 스레드)
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+
+        body = getattr(record, "body", None)
+        if body is not None:
+            body = str(body)
+            record.body_len = len(body)
+            if self.body_sample_rate < 1.0 and random.random() >= self.body_sample_rate:
+                record.body = None
+                record.body_sampled = False
+            elif len(body) > self.max_body_chars:
+                record.body = body[:self.max_body_chars] + f"... (+{len(body) - self.max_body_chars} chars)"
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1  # 버퍼가 가득 차면 렌더링을 막지 않고 버림
+
+@st.cache_resource
+def get_logging_pipeline(level, queue_size, max_body_chars, body_sample_rate):
+    """Install the process-wide queue handler and start its listener thread once"""
+    log_queue = queue.Queue(maxsize=queue_size)
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(JsonFormatter())
+    listener = logging.handlers.QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    listener.start()
+
+    handler = NonBlockingQueueHandler(log_queue, max_body_chars, body_sample_rate)
+    root = logging.getLogger()
+    root.setLevel(level)
+    root.addHandler(handler)
+    return handler
+
+def setup_logging(config):
+    """Configure non-blocking JSON logging for the application"""
+    get_logging_pipeline(
+        config.log_level, config.log_queue_size, config.log_max_body_chars, config.log_body_sample_rate
     )
     return logging.getLogger(__name__)
 
+def rerun_fragment():
+    """Rerun only the calling fragment; during a full-app run, rerun the app"""
+    try:
+        st.rerun(scope="fragment")
+    except st.errors.StreamlitAPIException:
+        st.rerun()
+
+def in_fragment_rerun():
+    """True while only fragments are rerunning (not during a full-app run)"""
+    ctx = get_script_run_ctx()
+    return bool(ctx and ctx.fragment_ids_this_run)
+
+def content_digest(value):
+    """Short stable digest of a JSON-serializable value"""
+    raw = json.dumps(value, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16]
+
 # Session Management
 class SessionManager:
     """Manages application session state"""
@@ -53,6 +222,9 @@ class SessionManager:
         
         if "viewport_height" not in st.session_state:
             st.session_state.viewport_height = 800
+
+        if "viewport_measured" not in st.session_state:
+            st.session_state.viewport_measured = False  # 세션당 1회만 측정
         
         if "is_streaming" not in st.session_state:
             st.session_state.is_streaming = False
@@ -72,16 +244,26 @@ class SessionManager:
         if "pending_message" not in st.session_state:
             st.session_state.pending_message = None  
 
+        if "task_write_errors" not in st.session_state:
+            st.session_state.task_write_errors = {}  # date -> 최종 실패한 쓰기 메시지
+
+        if "pending_action" not in st.session_state:
+            st.session_state.pending_action = None  # idempotency key 생성용 (action, date)
+
     @staticmethod
     def reset_session(logger):
-        """Reset the session state, preserving only viewport_height"""
+        """Reset the session state, preserving viewport and browser storage state"""
         current_session_id = st.session_state.get("session_id")
         current_viewport_height = st.session_state.get("viewport_height")
         logger.info(f"세션 리셋 요청 (ID: {current_session_id}).")
 
+        preserved_keys = [
+            "viewport_height", "viewport_measured", "resize_listener_mounted", "snapshot_checked",
+            BrowserStorage.ITEMS_KEY, TabStorage.ITEMS_KEY,
+        ]
         keys_to_clear = list(st.session_state.keys())
         for key in keys_to_clear:
-            if key not in ["viewport_height"]:
+            if key not in preserved_keys:
                 del st.session_state[key]
         
         st.session_state.session_id = f"session_{uuid.uuid4()}"
@@ -102,7 +284,1093 @@ class SessionManager:
             st.session_state.messages = []
         
         st.session_state.messages.append({"role": role, "content": content})
-        
+        SessionManager.mark_changed()
+
+    @staticmethod
+    def mark_changed():
+        """Flag a state change made during a fragment rerun so that fragment checkpoints it"""
+        st.session_state.checkpoint_pending = True
+
+    @staticmethod
+    def _task_key(task):
+        return f"{task.get('date', '')}|{task.get('task_no', '')}"
+
+    @staticmethod
+    def _plan_digest(task_list):
+        # 완료 여부를 제외한 계획 자체의 digest (체크 토글은 task_status 항목으로 기록)
+        # 썸네일(base64)은 직렬화 비용이 커서 길이만 반영
+        return content_digest([
+            {k: (len(v or "") if k == "thumbnail_base64" else v) for k, v in t.items() if k != "is_completed"}
+            for t in task_list
+        ])
+
+    @staticmethod
+    def _mark_persisted(session_id):
+        st.session_state.persisted_session_id = session_id
+        st.session_state.persisted_message_count = len(st.session_state.messages)
+        st.session_state.persisted_plan_digest = SessionManager._plan_digest(st.session_state.task_list)
+        st.session_state.persisted_task_status = {
+            SessionManager._task_key(t): bool(t.get("is_completed", False)) for t in st.session_state.task_list
+        }
+        st.session_state.persisted_feedback_digest = content_digest(st.session_state.feedback_list)
+
+    @staticmethod
+    def persist(store):
+        """Append state changes since the last persist to the server-side store"""
+        if store is None or st.session_state.get("is_streaming", False):
+            return
+        session_id = st.session_state.session_id
+        if st.session_state.get("persisted_session_id") != session_id:
+            # 새 세션 (리셋 포함): 아직 아무것도 기록되지 않은 상태
+            st.session_state.persisted_session_id = session_id
+            st.session_state.persisted_message_count = 0
+            st.session_state.persisted_plan_digest = SessionManager._plan_digest([])
+            st.session_state.persisted_task_status = {}
+            st.session_state.persisted_feedback_digest = content_digest([])
+
+        try:
+            messages = st.session_state.messages
+            for message in messages[st.session_state.persisted_message_count:]:
+                store.append(session_id, "message", message)
+            st.session_state.persisted_message_count = len(messages)
+
+            task_list = st.session_state.task_list
+            plan_digest = SessionManager._plan_digest(task_list)
+            statuses = {SessionManager._task_key(t): bool(t.get("is_completed", False)) for t in task_list}
+            if plan_digest != st.session_state.persisted_plan_digest:
+                store.append(session_id, "task_list", task_list)
+            else:
+                previous = st.session_state.persisted_task_status
+                for task in task_list:
+                    task_key = SessionManager._task_key(task)
+                    if previous.get(task_key) != statuses[task_key]:
+                        store.append(session_id, "task_status", {
+                            "date": task.get("date"),
+                            "task_no": task.get("task_no"),
+                            "is_completed": statuses[task_key],
+                        })
+            st.session_state.persisted_plan_digest = plan_digest
+            st.session_state.persisted_task_status = statuses
+
+            feedback_digest = content_digest(st.session_state.feedback_list)
+            if feedback_digest != st.session_state.persisted_feedback_digest:
+                store.append(session_id, "feedback_list", st.session_state.feedback_list)
+                st.session_state.persisted_feedback_digest = feedback_digest
+        except Exception as e:
+            logging.getLogger(__name__).error(f"세션 저장소 기록 실패: {e}")
+
+    @staticmethod
+    def checkpoint(store):
+        """Save changed state to browser storage and the server-side store"""
+        SessionSnapshot.save()
+        SessionManager.persist(store)
+        # 스트리밍 중에는 저장을 건너뛰므로 플래그를 유지
+        if not st.session_state.get("is_streaming", False):
+            st.session_state.checkpoint_pending = False
+
+    @staticmethod
+    def checkpoint_if_changed(store):
+        """Checkpoint only when a fragment rerun flagged a change (full runs checkpoint once at the end)"""
+        if st.session_state.get("checkpoint_pending", False):
+            SessionManager.checkpoint(store)
+
+    @staticmethod
+    def _load_plan(store, session_id):
+        """Latest full plan with later task_status entries applied"""
+        plan_id, task_list = store.latest(session_id, "task_list")
+        task_list = task_list or []
+        by_key = {SessionManager._task_key(t): t for t in task_list}
+        for _, status in store.entries(session_id, "task_status", after_id=plan_id):
+            task = by_key.get(SessionManager._task_key(status))
+            if task is not None:
+                task["is_completed"] = status.get("is_completed", False)
+        return task_list
+
+    @staticmethod
+    def hydrate_from_store(store, page_size, logger):
+        """Load the current plan, feedback and only the most recent messages for this session"""
+        session_id = st.session_state.session_id
+        try:
+            if store is None or not store.has_session(session_id):
+                return False
+            page = store.messages(session_id, limit=page_size)
+            st.session_state.task_list = SessionManager._load_plan(store, session_id)
+            st.session_state.feedback_list = store.latest(session_id, "feedback_list")[1] or []
+        except Exception as e:
+            logger.error(f"세션 저장소 조회 실패: {e}")
+            return False
+
+        st.session_state.messages = [message for _, message in page]
+        st.session_state.history_cursor = page[0][0] if page else None
+        st.session_state.history_has_more = len(page) >= page_size
+        SessionManager._mark_persisted(session_id)
+        logger.info(f"session_id: {session_id}, 세션 저장소에서 최근 메시지 {len(page)}개와 학습 계획 복원")
+        return True
+
+    @staticmethod
+    def load_older_messages(store, page_size):
+        """Page older history in front of the loaded messages"""
+        cursor = st.session_state.get("history_cursor")
+        if store is None or cursor is None:
+            return
+        page = store.messages(st.session_state.session_id, limit=page_size, before_id=cursor)
+        st.session_state.messages = [message for _, message in page] + st.session_state.messages
+        st.session_state.persisted_message_count = st.session_state.get("persisted_message_count", 0) + len(page)
+        st.session_state.history_cursor = page[0][0] if page else None
+        st.session_state.history_has_more = len(page) >= page_size
+
+# Session Store (서버 측 세션 저장소, append-only)
+class SessionStore(abc.ABC):
+    """Interface for server-side session persistence as append-only entries"""
+
+    @abc.abstractmethod
+    def append(self, session_id, kind, payload):
+        """Append one entry of kind for session_id"""
+
+    @abc.abstractmethod
+    def has_session(self, session_id):
+        """True if any entry exists for session_id"""
+
+    @abc.abstractmethod
+    def latest(self, session_id, kind):
+        """Return (entry_id, payload) of the newest entry of kind, or (None, None)"""
+
+    @abc.abstractmethod
+    def entries(self, session_id, kind, after_id=None):
+        """Return [(entry_id, payload)] of kind newer than after_id, oldest first"""
+
+    @abc.abstractmethod
+    def messages(self, session_id, limit, before_id=None):
+        """Return up to limit newest messages older than before_id, oldest first"""
+
+class SQLiteSessionStore(SessionStore):
+    """Local SQLite implementation of SessionStore"""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS session_entries (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    session_id TEXT NOT NULL,
+                    kind TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    created_at REAL NOT NULL
+                )"""
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_session_entries ON session_entries (session_id, kind, id)"
+            )
+
+    @contextlib.contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=5)
+        try:
+            with conn:  # 정상 종료 시 commit
+                yield conn
+        finally:
+            conn.close()
+
+    def append(self, session_id, kind, payload):
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT INTO session_entries (session_id, kind, payload, created_at) VALUES (?, ?, ?, ?)",
+                (session_id, kind, json.dumps(payload, ensure_ascii=False, default=str), time.time()),
+            )
+
+    def has_session(self, session_id):
+        with self._connect() as conn:
+            row = conn.execute("SELECT 1 FROM session_entries WHERE session_id = ? LIMIT 1", (session_id,)).fetchone()
+        return row is not None
+
+    def latest(self, session_id, kind):
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT id, payload FROM session_entries WHERE session_id = ? AND kind = ? ORDER BY id DESC LIMIT 1",
+                (session_id, kind),
+            ).fetchone()
+        return (row[0], json.loads(row[1])) if row else (None, None)
+
+    def entries(self, session_id, kind, after_id=None):
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT id, payload FROM session_entries WHERE session_id = ? AND kind = ? AND id > ? ORDER BY id",
+                (session_id, kind, after_id or 0),
+            ).fetchall()
+        return [(row[0], json.loads(row[1])) for row in rows]
+
+    def messages(self, session_id, limit, before_id=None):
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT id, payload FROM session_entries WHERE session_id = ? AND kind = 'message' AND id < ? "
+                "ORDER BY id DESC LIMIT ?",
+                (session_id, before_id if before_id is not None else 2**63 - 1, limit),
+            ).fetchall()
+        return [(row[0], json.loads(row[1])) for row in reversed(rows)]
+
+@st.cache_resource
+def get_session_store(backend, path):
+    """Process-wide session store (None when disabled or unavailable)"""
+    if backend != "sqlite":
+        return None
+    try:
+        return SQLiteSessionStore(path)
+    except Exception as e:
+        logging.getLogger(__name__).error(f"세션 저장소 초기화 실패 ({path}): {e}")
+        return None
+
+# Circuit Breaker (백엔드 장애 시 즉시 실패 + 주기적 헬스 체크)
+class BackendUnavailableError(Exception):
+    """Raised without calling the backend while the circuit breaker is open"""
+
+class CircuitBreaker:
+    """Process-wide circuit breaker fed by every backend call and a periodic health probe"""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, backend_url, failure_threshold=5, slow_call_seconds=30, probe_interval=10, health_path="/health"):
+        self.backend_url = backend_url
+        self.failure_threshold = failure_threshold
+        self.slow_call_seconds = slow_call_seconds
+        self.probe_interval = probe_interval
+        self.health_path = health_path
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        self._state = CircuitBreaker.CLOSED
+        self._failures = 0
+        self._prober = threading.Thread(target=self._probe_loop, name="backend-health-probe", daemon=True)
+        self._prober.start()
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._state
+
+    def is_open(self):
+        return self.state == CircuitBreaker.OPEN
+
+    def record_success(self, latency=None):
+        """Record a completed call; calls slower than slow_call_seconds count as failures"""
+        if latency is not None and latency > self.slow_call_seconds:
+            self.record_failure()
+            return
+        with self._lock:
+            if self._state != CircuitBreaker.CLOSED:
+                self.logger.info("백엔드 응답 복구: circuit closed")
+            self._state = CircuitBreaker.CLOSED
+            self._failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._state == CircuitBreaker.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != CircuitBreaker.OPEN:
+                    self.logger.warning(f"백엔드 연속 실패 {self._failures}회: circuit open (읽기 전용 모드)")
+                self._state = CircuitBreaker.OPEN
+
+    def call(self, method, url, slow_ok=False, http=None, **kwargs):
+        """Perform an HTTP request through the breaker"""
+        if self.is_open():
+            raise BackendUnavailableError("백엔드 서버에 연결할 수 없어 읽기 전용 모드로 전환되었습니다.")
+        start = time.monotonic()
+        try:
+            response = (http or requests).request(method, url, **kwargs)
+        except requests.exceptions.RequestException:
+            self.record_failure()
+            raise
+        if response.status_code >= 500:
+            self.record_failure()
+        else:
+            self.record_success(None if slow_ok else time.monotonic() - start)
+        return response
+
+    def _probe_loop(self):
+        while True:
+            time.sleep(self.probe_interval)
+            try:
+                # 404도 서버가 살아 있다는 의미이므로 5xx만 실패로 처리
+                ok = requests.get(f"{self.backend_url}{self.health_path}", timeout=3).status_code < 500
+            except Exception:
+                ok = False
+            with self._lock:
+                state = self._state
+            if ok and state == CircuitBreaker.OPEN:
+                with self._lock:
+                    self._state = CircuitBreaker.HALF_OPEN  # 다음 실제 호출 결과로 확정
+                    self._failures = 0
+                self.logger.info("백엔드 헬스 체크 성공: circuit half-open")
+            elif not ok:
+                self.record_failure()
+
+@st.cache_resource
+def get_circuit_breaker(backend_url, **options):
+    """Process-wide circuit breaker shared by all sessions"""
+    return CircuitBreaker(backend_url, **options)
+
+# Task Write-Behind Queue (낙관적 업데이트 후 백그라운드에서 백엔드 반영)
+class TaskWriteQueue:
+    """Background worker that coalesces, batches and retries task status writes"""
+
+    def __init__(self, breaker, batch_window=0.3, max_attempts=3, retry_backoff=1.0, concurrency=4):
+        self.breaker = breaker
+        self.batch_window = batch_window
+        self.max_attempts = max_attempts
+        self.retry_backoff = retry_backoff
+        self._cond = threading.Condition()
+        self._pending = {}    # (session_id, date, task_no) -> write
+        self._in_flight = {}  # (session_id, date, task_no) -> write
+        self._failures = {}   # session_id -> [write]
+        self._busy = set()    # 쓰기를 전송 중인 session_id (세션 내 순서 보장)
+        self._local = threading.local()  # 전송 스레드별 requests.Session
+        # 세션별로 병렬 전송: 한 세션의 느린 쓰기가 다른 세션을 막지 않음
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="task-write")
+        self._worker = threading.Thread(target=self._run, name="task-write-queue", daemon=True)
+        self._worker.start()
+
+    def enqueue(self, backend_url, session_id, date, task_no, completed, previous):
+        """Queue a write; repeated toggles of the same task collapse into one"""
+        key = (session_id, date, task_no)
+        with self._cond:
+            write = self._pending.get(key)
+            if write is None:
+                self._pending[key] = {
+                    "backend_url": backend_url,
+                    "session_id": session_id,
+                    "date": date,
+                    "task_no": task_no,
+                    "completed": completed,
+                    "previous": previous,
+                }
+            elif completed == write["previous"]:
+                del self._pending[key]  # 토글이 상쇄되면 쓰기 생략
+            else:
+                write["completed"] = completed
+            self._cond.notify_all()
+
+    def pending_count(self, session_id, date=None):
+        with self._cond:
+            return sum(
+                1 for key in list(self._pending) + list(self._in_flight)
+                if key[0] == session_id and (date is None or key[1] == date)
+            )
+
+    def drain_failures(self, session_id):
+        """Return and forget writes that failed after all retries"""
+        with self._cond:
+            return self._failures.pop(session_id, [])
+
+    def _has_ready(self):
+        return any(key[0] not in self._busy for key in self._pending)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._has_ready():
+                    self._cond.wait()
+            # 짧은 시간 동안 들어온 토글을 모아서 한 번에 처리
+            time.sleep(self.batch_window)
+            with self._cond:
+                # 전송 중인 세션의 쓰기는 다음 배치로 미룸
+                by_session = {}
+                for key, write in list(self._pending.items()):
+                    if key[0] in self._busy:
+                        continue
+                    del self._pending[key]
+                    self._in_flight[key] = write
+                    by_session.setdefault(key[0], []).append((key, write))
+                self._busy.update(by_session)
+
+            for session_id, batch in by_session.items():
+                self._executor.submit(self._send_session, session_id, batch)
+
+    def _send_session(self, session_id, batch):
+        try:
+            for key, write in batch:
+                ok, error = self._send_with_retry(write)
+                with self._cond:
+                    self._in_flight.pop(key, None)
+                    # 같은 task에 더 최신 쓰기가 대기 중이면 실패는 무시 (최신 값이 덮어씀)
+                    if not ok and key not in self._pending:
+                        write["error"] = error
+                        self._failures.setdefault(write["session_id"], []).append(write)
+        finally:
+            with self._cond:
+                self._busy.discard(session_id)
+                self._cond.notify_all()
+
+    def _send_with_retry(self, write):
+        error = None
+        for attempt in range(self.max_attempts):
+            try:
+                http = getattr(self._local, "http", None)
+                if http is None:
+                    http = self._local.http = requests.Session()  # 연결 재사용
+                response = self.breaker.call(
+                    "POST",
+                    f"{write['backend_url']}/tasks/update",
+                    http=http,
+                    json={
+                        "date": write["date"],
+                        "task_no": write["task_no"],
+                        "completed": write["completed"],
+                        "session_id": write["session_id"],
+                    },
+                    timeout=10,
+                )
+                if response.status_code == 200:
+                    return True, None
+                error = f"업데이트 실패: {response.text}"
+                if response.status_code < 500:
+                    break  # 클라이언트 오류는 재시도하지 않음
+            except BackendUnavailableError as e:
+                return False, str(e)  # circuit open: 재시도해도 즉시 실패
+            except Exception as e:
+                error = f"업데이트 중 오류: {e}"
+            # 마지막 시도 후나 circuit이 열린 뒤에는 기다리지 않음
+            if attempt + 1 >= self.max_attempts or self.breaker.is_open():
+                break
+            time.sleep(self.retry_backoff * (2 ** attempt))
+        return False, error
+
+@st.cache_resource
+def get_task_write_queue(batch_window, max_attempts, concurrency, _breaker):
+    """Process-wide write-behind queue shared by all sessions"""
+    return TaskWriteQueue(_breaker, batch_window=batch_window, max_attempts=max_attempts, concurrency=concurrency)
+
+# Stream Admission Control (프로세스당 동시 스트림 제한, FIFO 대기열)
+class StreamOverloadedError(Exception):
+    """Raised when the stream wait queue is full or the wait times out"""
+
+class StreamAdmission:
+    """Limits concurrent chat streams per process with a fair FIFO wait queue"""
+
+    def __init__(self, max_in_flight, max_queue, max_wait):
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self._cond = threading.Condition()
+        self._in_flight = 0
+        self._queue = collections.deque()
+
+    def _acquire(self, on_wait):
+        ticket = object()
+        with self._cond:
+            if self._in_flight < self.max_in_flight and not self._queue:
+                self._in_flight += 1
+                return
+            if len(self._queue) >= self.max_queue:
+                raise StreamOverloadedError("현재 요청이 많아 대기열이 가득 찼습니다. 잠시 후 다시 시도해주세요.")
+            self._queue.append(ticket)
+
+        deadline = time.monotonic() + self.max_wait
+        last_position = None
+        try:
+            while True:
+                with self._cond:
+                    if self._queue[0] is ticket and self._in_flight < self.max_in_flight:
+                        self._queue.popleft()
+                        self._in_flight += 1
+                        self._cond.notify_all()
+                        return
+                    position = self._queue.index(ticket) + 1
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise StreamOverloadedError("대기 시간이 초과되었습니다. 잠시 후 다시 시도해주세요.")
+                    if position == last_position:
+                        self._cond.wait(min(remaining, 1.0))
+                        continue
+                # 순번 표시는 lock 밖에서 (rerun 중단 시 StopException이 여기서 발생)
+                last_position = position
+                if on_wait:
+                    on_wait(position)
+        except BaseException:
+            with self._cond:
+                if ticket in self._queue:
+                    self._queue.remove(ticket)
+                self._cond.notify_all()
+            raise
+
+    def _release(self):
+        with self._cond:
+            self._in_flight -= 1
+            self._cond.notify_all()
+
+    @contextlib.contextmanager
+    def slot(self, on_wait=None):
+        """Hold one stream slot; on_wait(position) is called while queued"""
+        self._acquire(on_wait)
+        try:
+            yield
+        finally:
+            self._release()
+
+@st.cache_resource
+def get_stream_admission(max_in_flight, max_queue, max_wait):
+    """Process-wide stream limiter shared by all sessions"""
+    return StreamAdmission(max_in_flight, max_queue, max_wait)
+
+# Request Coalescing (idempotency key 기반 중복 제출 병합)
+class RequestCoalescer:
+    """Coalesces duplicate /chat/stream submissions that share an idempotency key"""
+
+    WAIT_SLICE = 1.0  # 초, 중복 제출이 선행 요청을 기다리는 동안 on_wait 호출 간격
+
+    def __init__(self, window_seconds):
+        self.window_seconds = window_seconds
+        self._lock = threading.Lock()
+        self._entries = {}  # key -> {"created": ts, "done": Event, "result": ..., "cacheable": fn, "detached": bool}
+
+    @staticmethod
+    def make_key(session_id, action, date):
+        """Derive a stable idempotency key from session, action and date"""
+        raw = f"{session_id}|{action}|{date}"
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:32]
+
+    def _purge_expired(self, now):
+        expired = [
+            key for key, entry in self._entries.items()
+            if entry["done"].is_set() and now - entry["created"] > self.window_seconds
+        ]
+        for key in expired:
+            del self._entries[key]
+
+    def _wait(self, entry, timeout, on_wait):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not entry["done"].is_set():
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                return False
+            # 대기 중 진행 표시 (rerun/stop 중단도 이 호출에서 발생)
+            if on_wait:
+                on_wait()
+            entry["done"].wait(self.WAIT_SLICE if remaining is None else min(self.WAIT_SLICE, remaining))
+        return True
+
+    def run(self, key, func, cacheable=lambda result: True, wait_timeout=None, on_wait=None):
+        """Run func once per key within the window; on_wait() is called while waiting. Returns (result, reused)"""
+        while True:
+            with self._lock:
+                self._purge_expired(time.time())
+                entry = self._entries.get(key)
+                if entry is None:
+                    entry = {
+                        "created": time.time(), "done": threading.Event(), "result": None,
+                        "cacheable": cacheable, "detached": False,
+                    }
+                    self._entries[key] = entry
+                    break
+
+            # 동일 key 요청이 진행 중이거나 완료됨 → 결과 재사용
+            if not self._wait(entry, wait_timeout, on_wait):
+                return None, True
+            if entry["result"] is not None:
+                return entry["result"], True
+            # 선행 요청이 실패해 entry가 제거된 경우 다시 소유권 획득 시도
+
+        try:
+            result = func()
+        except BaseException:
+            with self._lock:
+                detached = entry["detached"]
+                if not detached:
+                    # 중단된 작업을 이어받는 곳이 없으면 entry를 제거해 같은 key로 재제출할 수 있게 함
+                    self._entries.pop(key, None)
+            if not detached:
+                entry["done"].set()
+            raise
+
+        self._finish(key, entry, result)
+        return result, False
+
+    def detach(self, key):
+        """Keep key's in-flight entry after its owner is interrupted; complete() publishes the result later"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry["done"].is_set():
+                return False
+            entry["detached"] = True
+            return True
+
+    def complete(self, key, result):
+        """Publish the result of a detached entry and wake submissions waiting on it"""
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is not None:
+            self._finish(key, entry, result)
+
+    def _finish(self, key, entry, result):
+        with self._lock:
+            if entry["cacheable"](result):
+                entry["result"] = result
+                entry["created"] = time.time()
+            else:
+                self._entries.pop(key, None)
+        entry["done"].set()
+
+@st.cache_resource
+def get_request_coalescer(window_seconds):
+    """Process-wide coalescer shared by all sessions"""
+    return RequestCoalescer(window_seconds)
+
+# Render Cache (채팅 마크다운 블록 파싱 캐시)
+class MarkdownBlocks:
+    """Splits assistant markdown into markdown and mermaid blocks"""
+
+    FENCE = re.compile(r"^\s*(```|~~~)\s*([\w-]*)")
+
+    @staticmethod
+    def parse(text):
+        """Return a list of (kind, payload) blocks; kind is markdown or mermaid"""
+        lines = text.split("\n")
+        blocks = []
+        pending = []
+
+        def flush():
+            if pending:
+                blocks.append(("markdown", "\n".join(pending)))
+                pending.clear()
+
+        i = 0
+        while i < len(lines):
+            line = lines[i]
+            fence = MarkdownBlocks.FENCE.match(line)
+            if fence:
+                end = i + 1
+                while end < len(lines) and not lines[end].strip().startswith(fence.group(1)):
+                    end += 1
+                if fence.group(2).lower() == "mermaid" and end < len(lines):
+                    flush()
+                    blocks.append(("mermaid", "\n".join(lines[i + 1:end])))
+                else:
+                    pending.extend(lines[i:end + 1])
+                i = end + 1
+                continue
+
+            pending.append(line)
+            i += 1
+        flush()
+        return blocks
+
+class RenderCache:
+    """Memory-bounded LRU of parsed markdown blocks keyed by content digest"""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries = collections.OrderedDict()  # digest -> (blocks, size)
+        self._size = 0
+        self.hits = 0
+        self.misses = 0
+
+    def blocks(self, text):
+        digest = content_digest(text)
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is not None:
+                self._entries.move_to_end(digest)
+                self.hits += 1
+                return entry[0]
+
+        blocks = MarkdownBlocks.parse(text)
+        # 파싱 결과는 원문과 비슷한 크기이므로 원문 길이로 근사
+        size = len(text.encode("utf-8")) * 2
+        with self._lock:
+            self.misses += 1
+            if size > self.max_bytes:
+                return blocks
+            if digest not in self._entries:
+                self._entries[digest] = (blocks, size)
+                self._size += size
+            while self._size > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._size -= evicted
+        return blocks
+
+@st.cache_resource
+def get_render_cache(max_bytes):
+    """Process-wide render cache shared by all sessions"""
+    return RenderCache(max_bytes)
+
+# Stream Record/Replay (스트림 기록 및 재생)
+class StreamRecorder:
+    """Wraps a /chat/stream response and writes each line with its arrival offset to a gzip JSONL log"""
+
+    FORMAT_VERSION = 1
+
+    def __init__(self, response, record_dir, request_id, session_id, started, queue_wait_ms=0.0):
+        self.response = response
+        self.status_code = response.status_code
+        self.started = started
+        os.makedirs(record_dir, exist_ok=True)
+        name = f"{datetime.now().strftime('%Y%m%d-%H%M%S')}_{request_id}.jsonl.gz"
+        self.path = os.path.join(record_dir, name)
+        self._header = {
+            "v": self.FORMAT_VERSION,
+            "request_id": request_id,
+            "session_id": session_id,
+            "status_code": self.status_code,
+            "queue_wait_ms": queue_wait_ms,  # 재생 시에는 사용하지 않음 (백엔드 지연과 구분)
+            "recorded_at": datetime.now().isoformat(timespec="seconds"),
+        }
+
+    def raise_for_status(self):
+        self.response.raise_for_status()
+
+    @staticmethod
+    def _dump(entry):
+        return (json.dumps(entry, ensure_ascii=False, separators=(",", ":")) + "\n").encode("utf-8")
+
+    def iter_lines(self, decode_unicode=False):
+        # 도착 시각은 대기열 통과 후 요청 시작 기준 ms (첫 줄 오프셋이 TTFB)
+        with gzip.open(self.path, "wb") as log:
+            log.write(self._dump(self._header))
+            for line in self.response.iter_lines(decode_unicode=decode_unicode):
+                offset = round((time.monotonic() - self.started) * 1000, 1)
+                text = line.decode("utf-8") if isinstance(line, bytes) else line
+                log.write(self._dump({"t": offset, "l": text}))
+                yield line
+
+class ReplayResponse:
+    """Response-like object that replays a recorded stream log with its original pacing"""
+
+    def __init__(self, path, speed=1.0):
+        opener = gzip.open if path.endswith(".gz") else open
+        with opener(path, "rt", encoding="utf-8") as log:
+            entries = [json.loads(line) for line in log if line.strip()]
+        header = entries[0] if entries and "l" not in entries[0] else {}
+        self.events = [e for e in entries if "l" in e]
+        self.status_code = header.get("status_code", 200)
+        self.speed = speed
+        self.url = path
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.exceptions.HTTPError(f"{self.status_code} replayed from {self.url}", response=self)
+
+    def iter_lines(self, decode_unicode=False):
+        # speed 1 = 원래 속도, N = N배속, 0 = 대기 없이 최대 속도
+        started = time.monotonic()
+        for event in self.events:
+            if self.speed > 0:
+                delay = event["t"] / 1000 / self.speed - (time.monotonic() - started)
+                if delay > 0:
+                    time.sleep(delay)
+            yield event["l"] if decode_unicode else event["l"].encode("utf-8")
+
+class ReplayTransport:
+    """Drop-in for the request function used by BackendClient that serves a recorded stream"""
+
+    def __init__(self, path, speed=1.0):
+        self.path = path
+        self.speed = speed
+
+    def __call__(self, method, url, **kwargs):
+        return ReplayResponse(self.path, self.speed)
+
+# Browser Storage (streamlit_local_storage / session storage 컴포넌트 래퍼)
+class BrowserStorage:
+    """Non-blocking access to browser localStorage (shared by all tabs, survives restarts)"""
+
+    ITEMS_KEY = "browser_storage_items"  # 세션 내 localStorage 사본
+    ATTEMPTS_KEY = "browser_storage_attempts"
+    GET_ALL_KEY = "browser_storage_get_all"
+    MAX_LOAD_ATTEMPTS = 3
+
+    @staticmethod
+    def _component():
+        # LocalStorage 클래스는 값이 도착할 때까지 busy-wait 하므로 컴포넌트를 직접 사용
+        from streamlit_local_storage import _st_local_storage
+        return _st_local_storage
+
+    @classmethod
+    def load(cls):
+        """Fetch all stored items once per session; call once per run (None until the browser replies)"""
+        items = st.session_state.get(cls.ITEMS_KEY)
+        if items is not None:
+            return items
+
+        attempts = st.session_state.get(cls.ATTEMPTS_KEY, 0) + 1
+        st.session_state[cls.ATTEMPTS_KEY] = attempts
+        try:
+            items = cls._component()(method="getAll", key=cls.GET_ALL_KEY, default=None)
+        except Exception:
+            items = {}
+        if items is None and attempts >= cls.MAX_LOAD_ATTEMPTS:
+            items = {}  # 브라우저 응답이 없으면 저장소 없이 진행
+        if items is not None:
+            st.session_state[cls.ITEMS_KEY] = dict(items)
+        return st.session_state.get(cls.ITEMS_KEY)
+
+    @classmethod
+    def items(cls):
+        """Return the session copy of browser storage (None while loading)"""
+        return st.session_state.get(cls.ITEMS_KEY)
+
+    @classmethod
+    def get(cls, item_key):
+        items = cls.items()
+        return items.get(item_key) if items else None
+
+    @classmethod
+    def set(cls, item_key, value, key):
+        try:
+            cls._component()(method="setItem", itemKey=item_key, itemValue=value, key=key)
+        except Exception:
+            return
+        items = st.session_state.get(cls.ITEMS_KEY)
+        if items is not None:
+            items[item_key] = value
+
+    @classmethod
+    def delete(cls, item_key, key):
+        try:
+            cls._component()(method="eraseItem", itemKey=item_key, key=key)
+        except Exception:
+            return
+        items = st.session_state.get(cls.ITEMS_KEY)
+        if items is not None:
+            items.pop(item_key, None)
+
+class TabStorage(BrowserStorage):
+    """Non-blocking access to per-tab browser sessionStorage (survives reloads, not other tabs)"""
+
+    ITEMS_KEY = "tab_storage_items"  # 세션 내 sessionStorage 사본
+    ATTEMPTS_KEY = "tab_storage_attempts"
+    GET_ALL_KEY = "tab_storage_get_all"
+
+    @staticmethod
+    def _component():
+        from streamlit_session_browser_storage import _st_session_browser_storage
+        return _st_session_browser_storage
+
+# Session Snapshot (브라우저 저장소 기반 세션 복원)
+class SessionSnapshot:
+    """Persists a compact, versioned snapshot of the session to per-tab browser storage"""
+
+    STORAGE_KEY = "mystudy_session_snapshot"
+    VERSION = 1
+    MAX_MESSAGES = 20
+
+    @staticmethod
+    def _compact_tasks(task_list):
+        # 썸네일(base64)은 용량이 커서 제외
+        # 복원 시 서버 측 저장소에 기록이 없으면 다음 task_update 전까지 미리보기 없이 표시
+        return [{k: v for k, v in task.items() if k != "thumbnail_base64"} for task in task_list]
+
+    @staticmethod
+    def _compact_messages(messages):
+        compact = []
+        for message in messages[-SessionSnapshot.MAX_MESSAGES:]:
+            content = message.get("content")
+            if isinstance(content, dict) and "messages" in content:
+                # 도구 실행 결과 본문은 화면에 표시되지 않으므로 제외
+                items = [
+                    {k: v for k, v in item.items() if not (item.get("type") == "tool" and k == "content")}
+                    for item in content["messages"]
+                ]
+                content = {"messages": items}
+            compact.append({"role": message.get("role"), "content": content})
+        return compact
+
+    @staticmethod
+    def save():
+        """Write the snapshot when plan, feedback or messages changed since the last save"""
+        if st.session_state.get("is_streaming", False):
+            return
+        # 복원 확인 전에는 저장하지 않음 (getAll보다 setItem이 먼저 실행되면 저장된 스냅샷을 빈 세션으로 덮어씀)
+        if not st.session_state.get("snapshot_checked", False):
+            return
+        task_list = st.session_state.get("task_list", [])
+        feedback_list = st.session_state.get("feedback_list", [])
+        messages = st.session_state.get("messages", [])
+        # 썸네일은 스냅샷에 저장하지 않으므로 revision 계산에서도 제외
+        compact_tasks = SessionSnapshot._compact_tasks(task_list)
+        revision = content_digest([compact_tasks, feedback_list, len(messages)])
+        if st.session_state.get("snapshot_revision") == revision:
+            return
+
+        snapshot = {
+            "v": SessionSnapshot.VERSION,
+            "session_id": st.session_state.session_id,
+            "saved_at": datetime.now().isoformat(timespec="seconds"),
+            "revision": revision,
+            "task_list": compact_tasks,
+            "feedback_list": feedback_list,
+            "messages": SessionSnapshot._compact_messages(messages),
+        }
+        # 탭별 sessionStorage에 저장: 다른 탭이나 다음 사용자에게 세션이 넘어가지 않음
+        TabStorage.set(
+            SessionSnapshot.STORAGE_KEY,
+            json.dumps(snapshot, ensure_ascii=False),
+            key=f"snapshot_set_{revision}",
+        )
+        st.session_state.snapshot_revision = revision
+
+    @staticmethod
+    def _load():
+        raw = TabStorage.get(SessionSnapshot.STORAGE_KEY)
+        if isinstance(raw, str):
+            try:
+                raw = json.loads(raw)
+            except (json.JSONDecodeError, TypeError):
+                return None
+        if not isinstance(raw, dict) or raw.get("v") != SessionSnapshot.VERSION:
+            return None
+        if not str(raw.get("session_id", "")).startswith("session_"):
+            return None
+        return raw
+
+    @staticmethod
+    def restore(breaker, session_store, page_size, logger):
+        """Hydrate a fresh session from the browser snapshot, then fetch only deltas from the backend"""
+        if st.session_state.get("snapshot_checked", False):
+            return
+        if TabStorage.items() is None or BrowserStorage.items() is None:
+            return  # 브라우저 저장소 응답 대기 중
+
+        st.session_state.snapshot_checked = True
+        # 이전 버전이 localStorage(모든 탭 공유)에 남긴 스냅샷은 복원하지 않고 삭제
+        if BrowserStorage.get(SessionSnapshot.STORAGE_KEY) is not None:
+            BrowserStorage.delete(SessionSnapshot.STORAGE_KEY, key="legacy_snapshot_delete")
+        # 사용자가 이미 새 세션에서 상호작용을 시작했다면 복원하지 않음
+        if st.session_state.messages or st.session_state.task_list:
+            return
+        snapshot = SessionSnapshot._load()
+        if snapshot is None:
+            return
+
+        st.session_state.session_id = snapshot["session_id"]
+        st.session_state.task_list = snapshot.get("task_list", [])
+        st.session_state.feedback_list = snapshot.get("feedback_list", [])
+        st.session_state.messages = snapshot.get("messages", [])
+        st.session_state.snapshot_revision = snapshot.get("revision")
+        logger.info(f"session_id: {st.session_state.session_id}, 브라우저 스냅샷에서 세션 복원")
+
+        # 서버 측 저장소에 기록이 있으면 그쪽이 우선 (썸네일 포함, 최근 메시지만 로드)
+        SessionManager.hydrate_from_store(session_store, page_size, logger)
+
+        SessionSnapshot._fetch_delta(breaker, snapshot.get("saved_at"), logger)
+
+    @staticmethod
+    def _fetch_delta(breaker, since, logger):
+        """Fetch plan/feedback changes made after the snapshot was saved"""
+        # GET /sessions/{id}/state는 아직 백엔드에 없는 엔드포인트 (백엔드 작업 대기 중)
+        # 지원 전에는 404가 반환되어 스냅샷 상태를 그대로 사용 (4xx는 circuit breaker 실패로 집계되지 않음)
+        try:
+            response = breaker.call(
+                "GET",
+                f"{breaker.backend_url}/sessions/{st.session_state.session_id}/state",
+                params={"since": since, "include_thumbnails": "true"},
+                timeout=5,
+            )
+            if response.status_code != 200:
+                return
+            data = response.json()
+            if not data.get("success"):
+                return
+            # 백엔드가 보낸 항목만 갱신 (변경 없으면 스냅샷 유지)
+            if data.get("task_list") is not None:
+                st.session_state.task_list = data["task_list"]
+            if data.get("feedback_list") is not None:
+                st.session_state.feedback_list = data["feedback_list"]
+        except Exception as e:
+            logger.warning(f"세션 변경분 조회 실패, 스냅샷 상태 유지: {e}")
+
+# Viewport Detection (세션당 1회 측정, 브라우저 저장소에 캐시)
+class ViewportTracker:
+    """Measures the viewport height once per session instead of on every rerun"""
+
+    STORAGE_KEY = "mystudy_viewport_height"
+    RESIZE_THRESHOLD = 40  # px, 이보다 작은 변화는 무시
+    RESIZE_DEBOUNCE_MS = 500
+
+    # resize 이벤트를 debounce 해서 실제 크기 변화만 브라우저 저장소에 기록 (round trip 없음)
+    # 세션당 한 번만 mount 하므로 listener는 부모 문서에 script로 심어 iframe이 제거된 뒤에도 동작
+    RESIZE_LISTENER = """
+    <script>
+    (function() {
+        const win = window.parent;
+        if (win.__mystudyViewportListener) return;
+        win.__mystudyViewportListener = true;
+        const script = win.document.createElement("script");
+        script.textContent = `
+            (function() {
+                let timer = null;
+                window.addEventListener("resize", function() {
+                    clearTimeout(timer);
+                    timer = setTimeout(function() {
+                        const previous = parseInt(localStorage.getItem("%(key)s") || "0", 10);
+                        const height = window.innerHeight;
+                        if (Math.abs(height - previous) >= %(threshold)d) {
+                            localStorage.setItem("%(key)s", String(height));
+                        }
+                    }, %(debounce)d);
+                });
+            })();
+        `;
+        win.document.head.appendChild(script);
+    })();
+    </script>
+    """
+
+    @staticmethod
+    def _valid_height(value):
+        try:
+            height = int(float(value))
+        except (TypeError, ValueError):
+            return None
+        return height if height > 0 else None
+
+    @staticmethod
+    def _apply(height):
+        st.session_state.viewport_height = height
+        st.session_state.viewport_measured = True
+
+    @staticmethod
+    def sync():
+        """Resolve viewport_height, mounting ScreenData only until the first measurement and the resize listener once"""
+        if not st.session_state.get("viewport_measured", False):
+            items = BrowserStorage.items()
+            # 1) 이전 세션에서 저장한 값이 있으면 측정 없이 사용
+            cached = ViewportTracker._valid_height(items.get(ViewportTracker.STORAGE_KEY)) if items else None
+            if items is None:
+                pass  # 브라우저 저장소 응답 대기 중
+            elif cached:
+                ViewportTracker._apply(cached)
+            else:
+                # 2) 저장된 값이 없으면 ScreenData로 1회 측정 (값은 다음 rerun에 도착)
+                stats = st.session_state.get("screen_stats")
+                height = ViewportTracker._valid_height(stats.get("innerHeight")) if isinstance(stats, dict) else None
+                if height:
+                    ViewportTracker._apply(height)
+                    BrowserStorage.set(ViewportTracker.STORAGE_KEY, height, key="viewport_height_set")
+                else:
+                    try:
+                        from st_screen_stats import ScreenData
+                        with st.container(border=False, height=1):
+                            ScreenData(setTimeout=ViewportTracker.RESIZE_DEBOUNCE_MS, timeout=0).st_screen_data(key="screen_stats")
+                    except Exception:
+                        pass
+
+        if not st.session_state.get("resize_listener_mounted", False):
+            st.session_state.resize_listener_mounted = True
+            with st.container(border=False, height=1):
+                st.iframe(
+                    ViewportTracker.RESIZE_LISTENER % {
+                        "key": ViewportTracker.STORAGE_KEY,
+                        "threshold": ViewportTracker.RESIZE_THRESHOLD,
+                        "debounce": ViewportTracker.RESIZE_DEBOUNCE_MS,
+                    },
+                    height=1,
+                )
+
 # UI Components
 class UI:
     """UI component management"""
@@ -137,15 +1405,20 @@ class UI:
     def create_sidebar(config, logger):
         """Create sidebar with basic info and controls"""
         
+        breaker = get_circuit_breaker(config.backend_url, **config.breaker_options)
+
         @st.dialog("설정")
         def settings_dialog():
+            if breaker.is_open():
+                st.warning("백엔드 서버에 연결할 수 없어 설정을 변경할 수 없습니다. 잠시 후 다시 시도해주세요.")
+                return
             
             st.subheader("교수자 타입 설정")
             
             # 현재 설정된 교수자 타입 불러오기 (세션별)
             current_professor_type = "T형"  # 기본값
             try:
-                prof_response = requests.get(f"{config.backend_url}/sessions/{st.session_state.session_id}/professor-type", timeout=5)
+                prof_response = breaker.call("GET", f"{config.backend_url}/sessions/{st.session_state.session_id}/professor-type", timeout=5)
                 if prof_response.status_code == 200:
                     prof_data = prof_response.json()
                     if prof_data.get("success"):
@@ -160,7 +1433,8 @@ class UI:
             if st.button("저장", use_container_width=True, type='secondary', key='professor_type_save'):
                 if professor_type:
                     try:
-                        response = requests.post(
+                        response = breaker.call(
+                            "POST",
                             f"{config.backend_url}/sessions/{st.session_state.session_id}/professor-type",
                             json={"professor_type": professor_type},
                             timeout=10
@@ -188,7 +1462,7 @@ class UI:
             has_existing_textbook = False
             existing_filename = "알 수 없는 교과서"
             try:
-                textbook_response = requests.get(f"{config.backend_url}/data/textbook", 
+                textbook_response = breaker.call("GET", f"{config.backend_url}/data/textbook", 
                                                 params={"session_id": st.session_state.session_id}, 
                                                 timeout=5)
                 if textbook_response.status_code == 200:
@@ -217,8 +1491,10 @@ class UI:
                         files = {"file": (pdf_file.name, pdf_file.read(), "application/pdf")}
                         data = {"session_id": st.session_state.session_id, "title": pdf_file.name.strip()}
 
-                        response = requests.post(
+                        response = breaker.call(
+                            "POST",
                             endpoint,
+                            slow_ok=True,  # 교과서 변환은 원래 오래 걸림
                             files=files,
                             data=data,
                             timeout=1200
@@ -240,7 +1516,7 @@ class UI:
             st.subheader("현재 교과서 DB")
             
             try:
-                textbook_response = requests.get(f"{config.backend_url}/data/textbook", 
+                textbook_response = breaker.call("GET", f"{config.backend_url}/data/textbook", 
                                                 params={"session_id": st.session_state.session_id}, 
                                                 timeout=10)
                 if textbook_response.status_code == 200:
@@ -274,19 +1550,11 @@ class UI:
             )
             
             if not st.session_state.get("is_streaming", False):
-                try:
-                    with st.container(border=False, height=1):
-                        screen_data = ScreenData()
-                        stats = screen_data.st_screen_data()
-
-                    if stats and "innerHeight" in stats:
-                        height = stats.get("innerHeight")
-                        if height is not None and isinstance(height, (int, float)) and height > 0:
-                            if st.session_state.get("viewport_height") != height:
-                                st.session_state.viewport_height = height
-                except Exception as e:
-                    if "viewport_height" not in st.session_state:
-                        st.session_state.viewport_height = 800
+                ViewportTracker.sync()
+
+            if breaker.is_open():
+                st.warning("백엔드 서버에 연결할 수 없습니다. 복구될 때까지 읽기 전용 모드로 동작합니다.", icon="⚠️")
+                st.fragment(UI._watch_backend_recovery, run_every=3)(breaker)
 
             st.divider()
             
@@ -300,16 +1568,19 @@ class UI:
                 time.sleep(1)
                 st.rerun()
     
+    @staticmethod
+    def _watch_backend_recovery(breaker):
+        """Poll the circuit breaker while degraded and redraw the app once it recovers"""
+        if not breaker.is_open():
+            st.rerun()
+
     @staticmethod
     def create_layout(viewport_height):
         """Create the main layout with task list and chat columns"""
         # Create main columns - 왼쪽 더 크게 (5:3 비율)
         task_column, chat_column = st.columns([5, 3], vertical_alignment="top", gap="medium")
         
-        # Chat container (오른쪽)
-        with chat_column:
-            chat_container = st.container(border=True, height=max(viewport_height - 60, 400))
-            response_status = st.status("에이전트 응답 완료", state="complete")
+        # Chat column (오른쪽)은 chat panel fragment가 직접 채움
             
         # Task list containers (왼쪽)
         with task_column:
@@ -333,12 +1604,14 @@ class UI:
 | frontend | [:red-background[바로가기]](https://github.com/wnsgml9807/25_AIED_11_frontend.git) |
 | backend | [:blue-background[바로가기]](https://github.com/wnsgml9807/25_AIED_11_backend.git) |""")
                 task_placeholders = []
+                dashboard_placeholder = None
             else:
                 # 실제 task list 표시용 컨테이너
                 with st.container(border=True, height=viewport_height): 
+                    dashboard_placeholder = st.empty()  # 학습 현황 대시보드
                     task_placeholders = [st.empty() for _ in range(20)]  # 최대 20일치
         
-        return chat_container, task_placeholders, response_status
+        return chat_column, task_placeholders, dashboard_placeholder
     
     @staticmethod
     def calculate_viewport_height(screen_height):
@@ -348,10 +1621,251 @@ class UI:
         else:
             return 400
 
+# Study Analytics (task/feedback 상태 기반 로컬 학습 통계)
+class StudyAnalytics:
+    """Progress statistics computed locally from task_list and feedback_list"""
+
+    # 메시지 전체가 짧은 진도 문의일 때만 로컬 답변 (예: "현재 진도 상황 알려줘")
+    # 계획 수정, 요약 요청 등 진도가 언급된 일반 요청은 에이전트로 전달
+    PROGRESS_QUESTION = re.compile(
+        r"^(?:(?:현재|지금|오늘|전체|내|나의)\s*)*(?:학습\s*)?"
+        r"(?:진도|진행\s*상황|진척도?|완료율|달성률)\s*(?:상황|현황)?\s*(?:은|는|이|가|을|를|좀)?\s*"
+        r"(?:알려\s*(?:줘|주세요)|보여\s*(?:줘|주세요)|어때요?|어떻게\s*(?:돼|돼요|되나요)|얼마(?:야|예요)?|몇\s*(?:%|퍼센트)?\s*(?:이야|야|예요)?)?"
+        r"\s*[?？!.]*$"
+    )
+    PROGRESS_QUESTION_MAX_CHARS = 30
+
+    @staticmethod
+    def _page_count(task):
+        try:
+            return max(int(task.get("end_pg")) - int(task.get("start_pg")) + 1, 0)
+        except (TypeError, ValueError):
+            return 0
+
+    @staticmethod
+    def _day_stats(tasks, has_feedback):
+        pages = [StudyAnalytics._page_count(t) for t in tasks]
+        done = [bool(t.get("is_completed", False)) for t in tasks]
+        return {
+            "total": len(tasks),
+            "completed": sum(done),
+            "pages": sum(pages),
+            "completed_pages": sum(p for p, d in zip(pages, done) if d),
+            "has_feedback": has_feedback,
+        }
+
+    @staticmethod
+    def _streaks(flags):
+        """(current, best) run lengths of consecutive True values"""
+        if not len(flags):
+            return 0, 0
+        edges = np.diff(np.concatenate(([0], flags.astype(int), [0])))
+        starts, ends = np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+        runs = ends - starts
+        if not len(runs):
+            return 0, 0
+        current = int(runs[-1]) if ends[-1] == len(flags) else 0
+        return current, int(runs.max())
+
+    @staticmethod
+    def compute():
+        """Return analytics, recomputing per-day stats only for days whose tasks or feedback changed"""
+        task_list = st.session_state.get("task_list", [])
+        feedback_dates = {f.get("date") for f in st.session_state.get("feedback_list", [])}
+        cache = st.session_state.setdefault("analytics_cache", {"digest": None, "days": {}, "result": None})
+
+        grouped = TaskUI._group_tasks_by_date(task_list)
+        day_inputs = {
+            date_str: [
+                [(t.get("task_no"), t.get("start_pg"), t.get("end_pg"), t.get("is_completed")) for t in tasks],
+                date_str in feedback_dates,
+            ]
+            for date_str, tasks in grouped.items()
+        }
+        digest = content_digest(day_inputs)
+        if cache["digest"] == digest:
+            return cache["result"]
+
+        days = {}
+        for date_str, tasks in grouped.items():
+            day_digest = content_digest(day_inputs[date_str])
+            cached = cache["days"].get(date_str)
+            if cached and cached[0] == day_digest:
+                days[date_str] = cached
+            else:
+                days[date_str] = (day_digest, StudyAnalytics._day_stats(tasks, date_str in feedback_dates))
+
+        dates = sorted(days)
+        stats = [days[d][1] for d in dates]
+        total = np.array([s["total"] for s in stats], dtype=float)
+        completed = np.array([s["completed"] for s in stats], dtype=float)
+        pages = np.array([s["pages"] for s in stats], dtype=float)
+        completed_pages = np.array([s["completed_pages"] for s in stats], dtype=float)
+
+        today = datetime.now().strftime("%Y-%m-%d")
+        past = np.array([d <= today for d in dates], dtype=bool)
+        rate = np.divide(completed, total, out=np.zeros_like(total), where=total > 0)
+        # 오늘까지 날짜의 미완료 할 일 누적 (밀린 할 일 추이)
+        backlog = np.cumsum(np.where(past, total - completed, 0.0))
+        # 연속 달성은 오늘까지의 날짜로만 계산 (미래 날짜가 있어도 진행 중인 연속 기록이 끊기지 않도록)
+        current_streak, best_streak = StudyAnalytics._streaks(((total > 0) & (completed == total))[past])
+
+        result = {
+            "dates": dates,
+            "completion_rate": [round(float(r) * 100, 1) for r in rate],
+            "pages": [int(p) for p in pages],
+            "completed_pages": [int(p) for p in completed_pages],
+            "backlog": [int(b) for b, is_past in zip(backlog, past) if is_past],
+            "total_tasks": int(total.sum()),
+            "completed_tasks": int(completed.sum()),
+            "total_pages": int(pages.sum()),
+            "done_pages": int(completed_pages.sum()),
+            "overall_rate": round(float(completed.sum() / total.sum()) * 100, 1) if total.sum() else 0.0,
+            "reflection_days": sum(1 for s in stats if s["has_feedback"]),
+            "current_streak": current_streak,
+            "best_streak": best_streak,
+            "today": days[today][1] if today in days else None,
+        }
+        cache.update(digest=digest, days=days, result=result)
+        return result
+
+    @staticmethod
+    def is_progress_question(prompt):
+        prompt = (prompt or "").strip()
+        if len(prompt) > StudyAnalytics.PROGRESS_QUESTION_MAX_CHARS:
+            return False
+        return bool(StudyAnalytics.PROGRESS_QUESTION.match(prompt))
+
+    @staticmethod
+    def summary_line(analytics):
+        return (
+            f"[학습 통계] 완료율 {analytics['overall_rate']}% ({analytics['completed_tasks']}/{analytics['total_tasks']} 할 일), "
+            f"완료 페이지 {analytics['done_pages']}/{analytics['total_pages']}p, "
+            f"연속 달성 {analytics['current_streak']}일 (최고 {analytics['best_streak']}일), "
+            f"성찰록 {analytics['reflection_days']}/{len(analytics['dates'])}일"
+        )
+
+    @staticmethod
+    def progress_answer(analytics):
+        """Markdown answer for routine progress questions, without an LLM round trip"""
+        lines = [
+            "📊 **현재 진도 상황**",
+            f"- 전체 완료율: **{analytics['overall_rate']}%** ({analytics['completed_tasks']}/{analytics['total_tasks']} 할 일)",
+            f"- 완료 페이지: {analytics['done_pages']}/{analytics['total_pages']}p",
+        ]
+        today = analytics["today"]
+        if today:
+            lines.append(f"- 오늘: {today['completed']}/{today['total']} 할 일 완료 ({today['completed_pages']}/{today['pages']}p)")
+        if analytics["backlog"]:
+            lines.append(f"- 밀린 할 일: {analytics['backlog'][-1]}개")
+        lines.append(f"- 연속 달성: {analytics['current_streak']}일 (최고 {analytics['best_streak']}일)")
+        lines.append(f"- 성찰록 작성: {analytics['reflection_days']}/{len(analytics['dates'])}일")
+        return "\n".join(lines)
+
+# Page Range Index (계획 페이지 구간 인덱스)
+class PageRangeIndex:
+    """Interval index over task page ranges, built once per plan update"""
+
+    def __init__(self, tasks):
+        intervals = []
+        for t in tasks:
+            try:
+                start, end = int(t.get("start_pg")), int(t.get("end_pg"))
+            except (TypeError, ValueError):
+                continue
+            if end < start:
+                start, end = end, start
+            intervals.append((start, end, t.get("date", ""), t.get("task_no")))
+
+        # 구간 경계로 나눈 기본 구간(elementary segment)마다 덮는 task 목록을 미리 계산
+        bounds = sorted({start for start, _, _, _ in intervals} | {end + 1 for _, end, _, _ in intervals})
+        covers = [[] for _ in bounds]
+        for start, end, date_str, task_no in intervals:
+            lo, hi = bisect.bisect_left(bounds, start), bisect.bisect_left(bounds, end + 1)
+            for i in range(lo, hi):
+                covers[i].append((date_str, task_no))
+        self.bounds = bounds
+        self.covers = covers
+        self.first_page = bounds[0] if bounds else None
+        self.last_page = bounds[-1] - 1 if bounds else None
+
+    @staticmethod
+    def for_plan(task_list):
+        """Return the index for the current plan, rebuilding only when page ranges changed"""
+        ranges = [(t.get("date"), t.get("task_no"), t.get("start_pg"), t.get("end_pg")) for t in task_list]
+        digest = content_digest(ranges)
+        cached = st.session_state.get("page_index")
+        if cached and cached[0] == digest:
+            return cached[1]
+        index = PageRangeIndex(task_list)
+        st.session_state.page_index = (digest, index)
+        return index
+
+    def lookup(self, page):
+        """(date, task_no) pairs whose range covers the page"""
+        if page is None:
+            return []
+        i = bisect.bisect_right(self.bounds, page) - 1
+        if i < 0 or i >= len(self.bounds) - 1:
+            return []
+        return list(self.covers[i])
+
+    def _segments(self, predicate):
+        """Merged (start, end) page ranges of the segments matching predicate"""
+        ranges = []
+        for i in range(len(self.bounds) - 1):
+            if predicate(self.covers[i]):
+                start, end = self.bounds[i], self.bounds[i + 1] - 1
+                if ranges and ranges[-1][1] + 1 == start:
+                    ranges[-1] = (ranges[-1][0], end)
+                else:
+                    ranges.append((start, end))
+        return ranges
+
+    def gaps(self):
+        """Unplanned page ranges between the first and last planned page"""
+        return self._segments(lambda covering: not covering)
+
+    def overlaps(self):
+        """Page ranges planned by more than one task"""
+        return self._segments(lambda covering: len(covering) > 1)
+
+    def coverage(self):
+        """(covered pages, total pages) over the planned span"""
+        if self.first_page is None:
+            return 0, 0
+        total = self.last_page - self.first_page + 1
+        return total - sum(end - start + 1 for start, end in self.gaps()), total
+
+    @staticmethod
+    def format_ranges(ranges, limit=5):
+        text = ", ".join(f"{s}p" if s == e else f"{s}-{e}p" for s, e in ranges[:limit])
+        return text + (f" 외 {len(ranges) - limit}구간" if len(ranges) > limit else "")
+
+# Progressive Previews (접힌 날짜용 저해상도 미리보기)
+@st.cache_data(max_entries=4096, show_spinner=False)
+def make_preview_placeholder(thumbnail, width=40):
+    """Downscale a base64 thumbnail to a tiny JPEG data URL"""
+    if not thumbnail:
+        return None
+    try:
+        from PIL import Image
+        _, _, data = thumbnail.partition(",") if thumbnail.startswith("data:") else ("", "", thumbnail)
+        image = Image.open(io.BytesIO(base64.b64decode(data)))
+        image.thumbnail((width, width * 2))
+        buffer = io.BytesIO()
+        image.convert("RGB").save(buffer, format="JPEG", quality=40)
+        return "data:image/jpeg;base64," + base64.b64encode(buffer.getvalue()).decode("ascii")
+    except Exception:
+        return None
+
 # Task Management UI
 class TaskUI:
     """Handles task list rendering and interaction (state 기반)"""
 
+    DASHBOARD_FRAGMENT_KEY = "study_dashboard"
+    WRITE_POLL_INTERVAL = 0.5  # 초, 토글 후 쓰기 완료 확인 주기
+
     @staticmethod
     def format_date_display(date_str):
         try:
@@ -360,6 +1874,84 @@ class TaskUI:
         except Exception:
             return f"{date_str} 학습 계획"
 
+    @staticmethod
+    @st.fragment(key=DASHBOARD_FRAGMENT_KEY)
+    def render_dashboard_fragment():
+        """Dashboard as its own fragment so task toggles can refresh it without a full rerun"""
+        TaskUI.render_dashboard(StudyAnalytics.compute())
+
+    @staticmethod
+    def render_dashboard(analytics):
+        """Progress dashboard computed locally"""
+        if not analytics or not analytics["dates"]:
+            return
+        with st.expander("📊 학습 현황", expanded=False):
+            col1, col2, col3, col4 = st.columns(4)
+            col1.metric("완료율", f"{analytics['overall_rate']}%")
+            col2.metric("완료 페이지", f"{analytics['done_pages']}/{analytics['total_pages']}p")
+            col3.metric("밀린 할 일", analytics["backlog"][-1] if analytics["backlog"] else 0)
+            col4.metric("연속 달성", f"{analytics['current_streak']}일", help=f"최고 기록 {analytics['best_streak']}일")
+
+            labels = [TaskUI.format_date_display(d).replace(" 학습 계획", "") for d in analytics["dates"]]
+            st.bar_chart(
+                {"날짜": labels, "완료율(%)": analytics["completion_rate"], "페이지": analytics["pages"]},
+                x="날짜", y=["완료율(%)", "페이지"], stack=False, height=200,
+            )
+            if len(analytics["backlog"]) > 1:
+                st.line_chart({"날짜": labels[:len(analytics["backlog"])], "밀린 할 일": analytics["backlog"]}, x="날짜", height=150)
+
+    @staticmethod
+    def _jump_to_page(index):
+        """number_input callback: focus the first day that covers the chosen page"""
+        page = st.session_state.page_jump
+        if page is None:
+            # 입력을 지우면 기본 펼침 날짜로 되돌림
+            st.session_state.jump_date = None
+            st.session_state.jump_matches = []
+            return
+        matches = index.lookup(page)
+        st.session_state.jump_date = matches[0][0] if matches else None
+        st.session_state.jump_matches = matches
+
+    @staticmethod
+    def render_page_index(index):
+        """Coverage bar, gap/overlap warnings and jump-to-page control for the plan"""
+        if index.first_page is None:
+            return
+        covered, total = index.coverage()
+        st.progress(covered / total, text=f"📖 {index.first_page}-{index.last_page}p 중 {covered}p 계획됨")
+
+        gaps, overlaps = index.gaps(), index.overlaps()
+        if gaps:
+            st.caption(f"⚠️ 계획에 빠진 페이지: {PageRangeIndex.format_ranges(gaps)}")
+        if overlaps:
+            st.caption(f"🔁 중복 계획된 페이지: {PageRangeIndex.format_ranges(overlaps)}")
+
+        col1, col2 = st.columns([1, 2])
+        with col1:
+            st.number_input(
+                "페이지로 이동", min_value=index.first_page, max_value=index.last_page, value=None,
+                step=1, key="page_jump", on_change=TaskUI._jump_to_page, args=(index,),
+                placeholder="페이지", label_visibility="collapsed",
+            )
+        with col2:
+            page = st.session_state.get("page_jump")
+            if page is not None:
+                matches = st.session_state.get("jump_matches", [])
+                if matches:
+                    st.caption(" · ".join(f"{TaskUI.format_date_display(d).replace(' 학습 계획', '')} #{n}" for d, n in matches))
+                else:
+                    st.caption(f"{page}p는 계획에 없습니다")
+
+    @staticmethod
+    def _focus_date(sorted_dates):
+        """Today if planned, otherwise the next planned day (or the last one)"""
+        today = datetime.now().strftime("%Y-%m-%d")
+        for date_str in sorted_dates:
+            if date_str >= today:
+                return date_str
+        return sorted_dates[-1] if sorted_dates else None
+
     @staticmethod
     def _group_tasks_by_date(task_list):
         from collections import defaultdict
@@ -369,13 +1961,76 @@ class TaskUI:
         return groups
 
     @staticmethod
-    def render_task_lists(task_placeholders, backend_client):
+    def day_fragment_key(date_str):
+        return f"task_day_{date_str}"
+
+    @staticmethod
+    def render_day_fragment(date_str, backend_client, session_store, write_queue, expanded):
+        """Render one day as an independently rerunnable fragment, keyed so callbacks can rerun it"""
+        st.fragment(TaskUI._render_day, key=TaskUI.day_fragment_key(date_str))(
+            date_str, backend_client, session_store, write_queue, expanded
+        )
+
+    @staticmethod
+    def _render_day(date_str, backend_client, session_store, write_queue, expanded):
+        # 실패한 쓰기를 되돌리면 대시보드까지 다시 그리도록 전체 rerun
+        if TaskUI.reconcile_task_writes(write_queue) and in_fragment_rerun():
+            st.rerun()
+        tasks_list = [t for t in st.session_state.task_list if t.get("date", "") == date_str]
+        TaskUI.render_single_day_tasks(date_str, tasks_list, backend_client, write_queue, expanded)
+
+        # 체크 토글은 이 fragment만 rerun 되므로 바뀐 경우에만 여기서 저장
+        SessionManager.checkpoint_if_changed(session_store)
+
+        # 백그라운드 쓰기가 남아 있는 동안만 상태를 폴링
+        pending = write_queue.pending_count(st.session_state.session_id, date_str)
+        if not pending:
+            return
+        if in_fragment_rerun():
+            # 토글 직후: 이 fragment 자체를 짧게 반복 실행하고, 쓰기가 끝나면 더 이상 rerun 하지 않음
+            st.caption(f"💾 저장 중... ({pending}건)")
+            time.sleep(TaskUI.WRITE_POLL_INTERVAL)
+            rerun_fragment()
+        else:
+            # 전체 실행 중에는 fragment 단위 rerun을 할 수 없으므로 하위 polling fragment 사용
+            st.fragment(TaskUI._render_write_status, run_every=1)(date_str, write_queue)
+
+    @staticmethod
+    def _render_write_status(date_str, write_queue):
+        """Show pending writes for a day and surface failures once retries are exhausted"""
+        pending = write_queue.pending_count(st.session_state.session_id, date_str)
+        if TaskUI.reconcile_task_writes(write_queue) or not pending:
+            # 되돌린 상태를 그리고, polling fragment도 함께 제거
+            st.rerun()
+        st.caption(f"💾 저장 중... ({pending}건)")
+
+    @staticmethod
+    def reconcile_task_writes(write_queue):
+        """Roll back local state for writes that ultimately failed. Returns True if anything was rolled back"""
+        failures = write_queue.drain_failures(st.session_state.session_id)
+        for write in failures:
+            for t in st.session_state.task_list:
+                if t.get("date") == write["date"] and t.get("task_no") == write["task_no"]:
+                    # 이후 사용자가 다시 바꾸지 않은 경우에만 되돌림
+                    if bool(t.get("is_completed", False)) == write["completed"]:
+                        t["is_completed"] = write["previous"]
+                        SessionManager.mark_changed()
+                    break
+            st.session_state.task_write_errors.setdefault(write["date"], []).append(write.get("error"))
+        return bool(failures)
+
+    @staticmethod
+    def render_task_lists(task_placeholders, backend_client, session_store, write_queue):
         if not st.session_state.task_list:
             return
 
         grouped = TaskUI._group_tasks_by_date(st.session_state.task_list)
 
         sorted_dates = sorted(grouped.keys())
+        focus_date = TaskUI._focus_date(sorted_dates)
+        # 페이지 이동으로 선택한 날짜가 있으면 그 날짜를 펼침
+        if st.session_state.get("jump_date") in grouped:
+            focus_date = st.session_state.jump_date
         all_tasks_completed = True
         all_feedbacks_completed = True
         
@@ -384,8 +2039,10 @@ class TaskUI:
         
         for idx, date_str in enumerate(sorted_dates):
             if idx < len(task_placeholders):
-                with task_placeholders[idx]:
-                    TaskUI.render_single_day_tasks(date_str, grouped[date_str], backend_client)
+                with task_placeholders[idx].container():
+                    TaskUI.render_day_fragment(
+                        date_str, backend_client, session_store, write_queue, expanded=(date_str == focus_date)
+                    )
                 
                 # 해당 날짜의 모든 task가 완료되었는지 확인
                 # for task in grouped[date_str]:
@@ -404,15 +2061,19 @@ class TaskUI:
 
         # 모든 학습과 피드백이 완료되었으면 주간 마무리 버튼 표시
         all_learning_completed = all_tasks_completed and all_feedbacks_completed and len(sorted_dates) > 0
+        read_only = backend_client.is_read_only()
         
         with task_placeholders[len(sorted_dates)]:
-            if st.button(f"📚 학습 과정 마무리 : {completed_count}/{len(sorted_dates)}일 완료", key="weekly_summary_btn", type="primary", use_container_width=True, disabled=not all_learning_completed):
+            if st.button(f"📚 학습 과정 마무리 : {completed_count}/{len(sorted_dates)}일 완료", key="weekly_summary_btn", type="primary", use_container_width=True, disabled=not all_learning_completed or read_only):
                 # 주간 학습 마무리 메시지 전송
                 start_date = sorted_dates[0]
                 end_date = sorted_dates[-1]
                 summary_message = f"{start_date}부터 {end_date}까지의 학습을 모두 마쳤습니다. 이번 주 학습 내용을 종합하여 정리하고, 성찰록을 종합해주세요."
+                # 진도 통계는 로컬에서 계산해 함께 전달 (에이전트가 다시 계산하지 않도록)
+                summary_message += f"\n\n{StudyAnalytics.summary_line(StudyAnalytics.compute())}"
                 
                 st.session_state.pending_message = summary_message
+                st.session_state.pending_action = {"action": "course_summary", "date": f"{start_date}~{end_date}"}
                 st.rerun()
         
         if all_learning_completed:
@@ -424,37 +2085,78 @@ class TaskUI:
         #         st.info(f"학습 마무리까지 남은 일수: {len(sorted_dates) - completed_count}일")
 
     @staticmethod
-    def render_single_day_tasks(date_str, tasks_list, backend_client):
-        df_data = []
-        for task in tasks_list:
-            page_range = f"{task.get('start_pg', '')}-{task.get('end_pg', '')}"
-            
-            # Base64 인코딩된 썸네일 데이터 사용
-            thumbnail_data = task.get("thumbnail_base64")
-            
-            df_data.append({
-                "No": task.get("task_no", ""),
-                "페이지범위": page_range,
-                "미리보기": thumbnail_data,
-                #"제목": task.get("title", ""),
-                "요약": task.get("summary", ""),
-                "완료여부": task.get("is_completed", False),
-                "date": task.get("date", ""),  # hidden
-                "task_no": task.get("task_no", 0),  # hidden
-            })
+    def _on_task_edit(editor_key, table, backend_url, write_queue):
+        """data_editor callback: apply completion toggles optimistically and queue the backend writes"""
+        edited_rows = st.session_state[editor_key].get("edited_rows", {})
+        changed_dates = set()
+        for row_idx, changes in edited_rows.items():
+            row_idx = int(row_idx)
+            if "완료여부" not in changes or bool(changes["완료여부"]) == table["완료여부"][row_idx]:
+                continue
+            date_val = table["date"][row_idx]
+            task_no_val = int(table["task_no"][row_idx])
+            new_status = bool(changes["완료여부"])
+
+            # 낙관적 업데이트: 로컬 state를 먼저 반영하고 백엔드 쓰기는 큐에 위임
+            for t in st.session_state.task_list:
+                if t.get("date") == date_val and t.get("task_no") == task_no_val:
+                    t["is_completed"] = new_status
+                    break
+            write_queue.enqueue(
+                backend_url, st.session_state.session_id,
+                date_val, task_no_val, new_status, previous=not new_status,
+            )
+            changed_dates.add(date_val)
+        if not changed_dates:
+            return
 
-        df = pd.DataFrame(df_data)
-        if df.empty:
+        SessionManager.mark_changed()
+        # 해당 날짜 fragment와 학습 현황 대시보드만 rerun
+        try:
+            st.rerun([TaskUI.day_fragment_key(d) for d in sorted(changed_dates)] + [TaskUI.DASHBOARD_FRAGMENT_KEY])
+        except st.errors.StreamlitAPIException:
+            pass  # 대시보드가 아직 그려지지 않은 경우 기본 동작(해당 fragment rerun)
+
+    @staticmethod
+    def render_single_day_tasks(date_str, tasks_list, backend_client, write_queue, expanded=True):
+        if not tasks_list:
             return
 
-        completed_count = df["완료여부"].sum()
-        total_count = len(df)
+        # 펼쳐진 날짜(오늘)만 원본 미리보기, 나머지는 저해상도 미리보기를 먼저 전송
+        full_preview = expanded or st.session_state.get(f"full_preview_{date_str}", False)
+        previews = [
+            task.get("thumbnail_base64") if full_preview else make_preview_placeholder(task.get("thumbnail_base64"))
+            for task in tasks_list
+        ]
+
+        # pandas 없이 열 단위 dict로 구성 (st.data_editor는 dict 입력 시 dict 반환)
+        table = {
+            "No": [task.get("task_no", "") for task in tasks_list],
+            "페이지범위": [f"{task.get('start_pg', '')}-{task.get('end_pg', '')}" for task in tasks_list],
+            # Base64 인코딩된 썸네일 데이터 사용
+            "미리보기": previews,
+            #"제목": [task.get("title", "") for task in tasks_list],
+            "요약": [task.get("summary", "") for task in tasks_list],
+            "완료여부": [bool(task.get("is_completed", False)) for task in tasks_list],
+            "date": [task.get("date", "") for task in tasks_list],  # hidden
+            "task_no": [task.get("task_no", 0) for task in tasks_list],  # hidden
+        }
+
+        completed_count = sum(table["완료여부"])
+        total_count = len(tasks_list)
         display_title = TaskUI.format_date_display(date_str)
 
         progress_pct = int((completed_count / total_count) * 100) if total_count else 0
+        read_only = backend_client.is_read_only()  # 백엔드 장애 시 체크/완료 버튼 비활성화
 
-        with st.expander(f"📅 {display_title} ({completed_count}/{total_count} 완료)", expanded=True):
+        with st.expander(f"📅 {display_title} ({completed_count}/{total_count} 완료)", expanded=expanded):
             st.progress(progress_pct, text=f"{progress_pct}% 완료")
+            if not expanded:
+                st.toggle("🖼️ 원본 미리보기", key=f"full_preview_{date_str}")
+
+            # 재시도 후에도 실패한 쓰기만 표시 (로컬 상태는 이미 되돌림)
+            for error in st.session_state.task_write_errors.pop(date_str, []):
+                st.error(error or "업데이트 실패")
 
             column_config = {
                 "No": st.column_config.NumberColumn("No", width="small"),
@@ -471,38 +2173,18 @@ class TaskUI:
                 "task_no": None,
             }
 
-            edited_df = st.data_editor(
-                df,
+            editor_key = f"task_editor_{date_str}_{content_digest(table)}"
+            st.data_editor(
+                table,
                 column_config=column_config,
                 use_container_width=True,
-                row_height=150,
+                row_height=150 if full_preview else 60,
                 hide_index=True,
-                key=f"task_editor_{date_str}_{hash(str(df_data))}",
-                disabled=["No", "페이지범위", "미리보기", "요약", "date", "task_no"],
+                key=editor_key,
+                disabled=["No", "페이지범위", "미리보기", "요약", "date", "task_no"] + (["완료여부"] if read_only else []),
+                on_change=TaskUI._on_task_edit,
+                args=(editor_key, table, backend_client.backend_url, write_queue),
             )
-
-            if not edited_df.equals(df):
-                changed_rows = df.index[df["완료여부"] != edited_df["완료여부"]].tolist()
-                
-                # 모든 변경사항을 먼저 처리
-                has_changes = False
-                for row_idx in changed_rows:
-                    date_val = df.iloc[row_idx]["date"]
-                    task_no_val = int(df.iloc[row_idx]["task_no"])
-                    new_status = bool(edited_df.iloc[row_idx]["완료여부"])
-
-                    # 백엔드 업데이트가 성공한 경우에만 로컬 state 업데이트
-                    if TaskUI.update_task_status(date_val, task_no_val, new_status, backend_client):
-                        # 로컬 state 업데이트
-                        for t in st.session_state.task_list:
-                            if t.get("date") == date_val and t.get("task_no") == task_no_val:
-                                t["is_completed"] = new_status
-                                has_changes = True
-                                break
-                
-                # 변경사항이 있으면 UI 업데이트를 위해 rerun
-                if has_changes:
-                    st.rerun()
             
             # 해당 날짜의 피드백 찾기
             existing_feedback = None
@@ -513,7 +2195,7 @@ class TaskUI:
             
             # 학습 완료 버튼 (피드백이 없을 때만 표시)
             if not existing_feedback:
-                if st.button(f"📝 {date_str} 학습 완료", key=f"complete_btn_{date_str}", type="secondary", use_container_width=True):
+                if st.button(f"📝 {date_str} 학습 완료", key=f"complete_btn_{date_str}", type="secondary", use_container_width=True, disabled=read_only):
                     # 완료된 task 수 계산
                     completed_tasks = sum(1 for task in tasks_list if task.get("is_completed", False))
                     total_tasks = len(tasks_list)
@@ -523,6 +2205,7 @@ class TaskUI:
                     
                     # 채팅 입력으로 메시지 전송 시뮬레이션
                     st.session_state.pending_message = completion_message
+                    st.session_state.pending_action = {"action": "day_complete", "date": date_str}
                     st.rerun()
             
             # 성찰 피드백 표시
@@ -531,38 +2214,36 @@ class TaskUI:
                 st.write("📖 **나의 한 줄 성찰록**")
                 st.write(existing_feedback)
 
-    @staticmethod
-    def update_task_status(date, task_no, completed, backend_client):
-        try:
-            response = requests.post(
-                f"{backend_client.backend_url}/tasks/update",
-                json={
-                    "date": date,
-                    "task_no": task_no,
-                    "completed": completed,
-                    "session_id": st.session_state.session_id,
-                },
-                timeout=10,
-            )
-            if response.status_code != 200:
-                st.error(f"업데이트 실패: {response.text}")
-                return False
-            return True
-            
-        except Exception as e:
-            st.error(f"업데이트 중 오류: {e}")
-            return False
-
-
-        
 # Message Handling (기존 placeholder 기반 렌더링 복원)
 class MessageRenderer:
     """Handles message rendering and task list updates"""
     
-    def __init__(self, chat_container, task_placeholders, logger):
+    def __init__(self, chat_container, task_placeholders, logger, render_cache=None):
         self.chat_container = chat_container
         self.task_placeholders = task_placeholders
         self.logger = logger
+        self.render_cache = render_cache
+        self._mermaid_keys = collections.Counter()
+    
+    def _render_markdown(self, content):
+        """Render assistant markdown, drawing mermaid diagrams from cached blocks"""
+        if self.render_cache is None:
+            st.markdown(content)
+            return
+        for kind, payload in self.render_cache.blocks(content):
+            if kind == "mermaid":
+                self._render_mermaid(payload)
+            elif payload.strip():
+                st.markdown(payload)
+
+    def _render_mermaid(self, code):
+        # 같은 다이어그램이 여러 번 나와도 key가 겹치지 않도록 순번을 붙임
+        digest = content_digest(code)
+        self._mermaid_keys[digest] += 1
+        try:
+            streamlit_mermaid.st_mermaid(code, key=f"mermaid_{digest}_{self._mermaid_keys[digest]}")
+        except ImportError:
+            st.code(code, language="mermaid")
     
     def _get_friendly_tool_name(self, tool_name):
         """Translate internal tool names to user-friendly names."""
@@ -603,9 +2284,9 @@ class MessageRenderer:
             except (json.JSONDecodeError, TypeError):
                 if current_idx < len(placeholders):
                     with placeholders[current_idx].container(border=False):
-                        st.markdown(content)
+                        self._render_markdown(content)
                 else:
-                    st.markdown(content)
+                    self._render_markdown(content)
                 return
         else:
             msg_data = content
@@ -618,9 +2299,9 @@ class MessageRenderer:
                 if item_type == "text":
                         if current_idx < len(placeholders):
                             with placeholders[current_idx].container(border=False):
-                                st.markdown(item_content)
+                                self._render_markdown(item_content)
                         else:
-                            st.markdown(item_content)
+                            self._render_markdown(item_content)
                         current_idx += 1
                     
                 elif item_type == "task_update":
@@ -696,14 +2377,30 @@ class MessageRenderer:
 class BackendClient:
     """Handles communication with the backend API"""
     
-    def __init__(self, backend_url, chat_container, task_placeholders, response_status):
+    def __init__(self, backend_url, chat_container, task_placeholders, response_status, admission=None, breaker=None,
+                 transport=None, record_dir=None):
         self.backend_url = backend_url
         self.chat_container = chat_container
         self.task_placeholders = task_placeholders
         self.response_status = response_status
+        self.admission = admission
+        self.breaker = breaker
+        self.transport = transport  # 재생 모드에서는 백엔드 대신 기록된 스트림 사용
+        self.record_dir = record_dir
         self.logger = logging.getLogger(__name__)
+        self.request_id = None
+        self._started = None
+
+    def is_read_only(self):
+        """True while the circuit breaker is open (degraded read-only mode)"""
+        if self.transport is not None:
+            return False
+        return self.breaker is not None and self.breaker.is_open()
 
-    def send_message(self, prompt, session_id, viewport_height):
+    def _show_queue_position(self, position):
+        self.response_status.update(label=f"대기 중... (앞에 {position - 1}명)", state="running")
+
+    def send_message(self, prompt, session_id, viewport_height, idempotency_key=None, coalescer=None):
         """Send a message to the backend and process streaming response"""
         with self.chat_container:
             # Create placeholders for streaming content
@@ -711,35 +2408,75 @@ class BackendClient:
             
             # Initialize message data storage
             message_data = {"messages": []}
+            self.request_id = uuid.uuid4().hex[:12]
+            self._started = time.monotonic()
             
             try:
                 endpoint = f"{self.backend_url}/chat/stream"
-                response = requests.post(
-                    endpoint,
-                    json={"prompt": prompt, "session_id": session_id},
-                    stream=True,
-                    timeout=1200
-                )
-                response.raise_for_status()
-                
-                st.session_state.is_streaming = True
-                return self._process_stream(response, placeholders, message_data, viewport_height)
+                body = {"prompt": prompt, "session_id": session_id}
+                headers = {}
+                if idempotency_key:
+                    # 백엔드는 같은 key의 진행 중/완료된 실행 결과를 재사용
+                    body["idempotency_key"] = idempotency_key
+                    headers["Idempotency-Key"] = idempotency_key
+                request = self.transport or (self.breaker.call if self.breaker else requests.request)
+                slot = self.admission.slot(on_wait=self._show_queue_position) if self.admission else contextlib.nullcontext()
+                with contextlib.ExitStack() as held:
+                    held.enter_context(slot)
+                    # 대기열에서 기다린 시간은 TTFB와 분리해서 기록
+                    queue_wait_ms = round((time.monotonic() - self._started) * 1000, 1)
+                    self._started = time.monotonic()
+                    response = request(
+                        "POST",
+                        endpoint,
+                        json=body,
+                        headers=headers,
+                        stream=True,
+                        timeout=1200
+                    )
+                    response.raise_for_status()
+                    self.logger.info("stream started", extra={
+                        "event": "stream_start",
+                        "session_id": session_id,
+                        "request_id": self.request_id,
+                        "ttfb_ms": round((time.monotonic() - self._started) * 1000, 1),
+                        "queue_wait_ms": queue_wait_ms,
+                    })
+                    
+                    if self.record_dir:
+                        response = StreamRecorder(
+                            response, self.record_dir, self.request_id, session_id, self._started, queue_wait_ms
+                        )
+
+                    st.session_state.is_streaming = True
+                    handoff = None
+                    if coalescer and idempotency_key:
+                        # rerun으로 중단되면 나머지 스트림은 slot을 쥔 채 백그라운드에서 수신
+                        handoff = {"coalescer": coalescer, "key": idempotency_key, "held": held, "session_id": session_id}
+                    return self._process_stream(response, placeholders, message_data, viewport_height, handoff)
                 
+            except StreamOverloadedError as e:
+                self.response_status.update(label="요청 대기열 초과", state="error")
+                return self._handle_overload_error(e, placeholders, 0)
+            except BackendUnavailableError as e:
+                self.response_status.update(label="읽기 전용 모드", state="error")
+                return self._handle_overload_error(e, placeholders, 0)
             except requests.exceptions.RequestException as e:
                 return self._handle_request_error(e, placeholders, 0)
             except Exception as e:
                 return self._handle_generic_error(e, placeholders, 0)
     
-    def _process_stream(self, response, placeholders, message_data, viewport_height):
+    def _process_stream(self, response, placeholders, message_data, viewport_height, handoff=None):
         """Process streaming response from backend with placeholder rendering"""
         current_idx = 0
         text_buffer = ""
         text_placeholder = None
-        logger = logging.getLogger(__name__)
+        detached = False
         try:
+            lines = response.iter_lines(decode_unicode=True)
             self.response_status.update(label="AI 응답 중...", state="running")
 
-            for line in response.iter_lines(decode_unicode=True):
+            for line in lines:
                 if not line:
                     continue
 
@@ -756,7 +2493,7 @@ class BackendClient:
                                 text_placeholder = placeholders[current_idx].empty()
                             text_placeholder.markdown(text_buffer)
                             message_data["messages"].append({"type": "text", "content": text_buffer})
-                            logger.info(f"session_id: {st.session_state.session_id}, assistant response: \n{text_buffer}")
+                            self._log_assistant_text(text_buffer)
                             current_idx += 1
                             text_buffer = ""
                             text_placeholder = None
@@ -773,7 +2510,7 @@ class BackendClient:
                                 text_placeholder = placeholders[current_idx].empty()
                             text_placeholder.markdown(text_buffer)
                             message_data["messages"].append({"type": "text", "content": text_buffer})
-                            logger.info(f"session_id: {st.session_state.session_id}, assistant response: \n{text_buffer}")
+                            self._log_assistant_text(text_buffer)
                             current_idx += 1
                             text_buffer = ""
                             text_placeholder = None
@@ -802,7 +2539,7 @@ class BackendClient:
                                 text_placeholder = placeholders[current_idx].empty()
                             text_placeholder.markdown(text_buffer)
                             message_data["messages"].append({"type": "text", "content": text_buffer})
-                            logger.info(f"session_id: {st.session_state.session_id}, assistant response: \n{text_buffer}")
+                            self._log_assistant_text(text_buffer)
                             current_idx += 1
                             text_buffer = ""
                             text_placeholder = None
@@ -817,7 +2554,7 @@ class BackendClient:
                                 text_placeholder = placeholders[current_idx].empty()
                             text_placeholder.markdown(text_buffer)
                             message_data["messages"].append({"type": "text", "content": text_buffer})
-                            logger.info(f"session_id: {st.session_state.session_id}, assistant response: \n{text_buffer}")
+                            self._log_assistant_text(text_buffer)
                             current_idx += 1
                             text_buffer = ""
                             text_placeholder = None
@@ -832,7 +2569,7 @@ class BackendClient:
                                 text_placeholder = placeholders[current_idx].empty()
                             text_placeholder.markdown(text_buffer)
                             message_data["messages"].append({"type": "text", "content": text_buffer})
-                            logger.info(f"session_id: {st.session_state.session_id}, assistant response: \n{text_buffer}")
+                            self._log_assistant_text(text_buffer)
                             current_idx += 1
                             text_buffer = ""
                             text_placeholder = None
@@ -857,10 +2594,106 @@ class BackendClient:
                     self.logger.error(f"JSON decode error: {e}")
                     continue
 
+        except Exception:
+            raise
+        except BaseException:
+            # rerun/stop으로 중단됨 → 같은 key의 재제출이 결과에 합류할 수 있도록 스트림을 넘겨줌
+            if handoff:
+                # 같은 line iterator를 넘겨야 requests가 버퍼에 읽어 둔 줄을 잃지 않음
+                detached = self._detach_stream(lines, message_data, text_buffer, handoff)
+            raise
         finally:
             st.session_state.is_streaming = False
+            if not detached:
+                self.logger.info("stream finished", extra={
+                    "event": "stream_end",
+                    "session_id": st.session_state.get("session_id"),
+                    "request_id": self.request_id,
+                    "duration_ms": round((time.monotonic() - self._started) * 1000, 1),
+                })
 
         return message_data
+
+    def _detach_stream(self, lines, message_data, text_buffer, handoff):
+        """Hand an interrupted stream to a background drain; False if nothing can attach to it"""
+        if not handoff["coalescer"].detach(handoff["key"]):
+            return False
+        held = handoff["held"].pop_all()
+        threading.Thread(
+            target=self._drain_stream,
+            args=(lines, message_data, text_buffer, held, handoff),
+            name=f"stream-drain-{self.request_id}",
+            daemon=True,
+        ).start()
+        self.logger.info("stream detached", extra={
+            "event": "stream_detach", "session_id": handoff["session_id"], "request_id": self.request_id,
+        })
+        return True
+
+    def _drain_stream(self, lines, message_data, text_buffer, held, handoff):
+        """Read the rest of a detached stream without UI and publish the result to the coalescer"""
+        result = None
+        updates = {}
+        try:
+            for line in lines:
+                if not line:
+                    continue
+                try:
+                    payload = json.loads(line)
+                except json.JSONDecodeError as e:
+                    self.logger.error(f"JSON decode error: {e}")
+                    continue
+                msg_type = payload.get("type", "message")
+                text = payload.get("text", "")
+                if msg_type == "message":
+                    text_buffer += text
+                    continue
+                if text_buffer:
+                    message_data["messages"].append({"type": "text", "content": text_buffer})
+                    text_buffer = ""
+                if msg_type == "end":
+                    message_data["messages"].append({"type": "agent_change", "agent": "system", "info": "end"})
+                    break
+                elif msg_type == "task_update":
+                    updates["task_list"] = text
+                elif msg_type == "feedback_update":
+                    updates["feedback_list"] = text
+                elif msg_type == "tool":
+                    message_data["messages"].append({
+                        "type": "tool",
+                        "name": payload.get("tool_name", "도구"),
+                        "content": text,
+                    })
+            if text_buffer:
+                message_data["messages"].append({"type": "text", "content": text_buffer})
+            # task/feedback 갱신은 합류한 실행이 세션 상태에 반영 (백그라운드 스레드에서는 세션 상태 접근 불가)
+            result = dict(message_data, updates=updates) if updates else message_data
+        except Exception as e:
+            self.logger.error(f"Detached stream error: {e}")
+        finally:
+            held.close()
+            handoff["coalescer"].complete(handoff["key"], result)
+            self.logger.info("stream finished", extra={
+                "event": "stream_end",
+                "session_id": handoff["session_id"],
+                "request_id": self.request_id,
+                "duration_ms": round((time.monotonic() - self._started) * 1000, 1),
+            })
+
+    def apply_stream_updates(self, updates):
+        """Apply task/feedback updates collected by a detached stream"""
+        if "task_list" in updates:
+            self._handle_task_update_from_stream(updates["task_list"])
+        if "feedback_list" in updates:
+            self._handle_feedback_update_from_stream(updates["feedback_list"])
+
+    def _log_assistant_text(self, text):
+        self.logger.info("assistant response", extra={
+            "event": "assistant_text",
+            "session_id": st.session_state.session_id,
+            "request_id": self.request_id,
+            "body": text,
+        })
     
     def _get_friendly_tool_name(self, tool_name):
         """Translate internal tool names to user-friendly names."""
@@ -916,6 +2749,18 @@ class BackendClient:
             st.error(error_msg)
         return error_msg
     
+    def _handle_overload_error(self, error, placeholders, idx):
+        """Handle admission control rejections"""
+        error_msg = f"⏳ {error}"
+        self.logger.warning(error_msg)
+        
+        if idx < len(placeholders):
+            with placeholders[idx].container():
+                st.warning(error_msg)
+        else:
+            st.warning(error_msg)
+        return error_msg
+    
     def _handle_generic_error(self, error, placeholders, idx):
         """Handle generic errors"""
         error_msg = f"응답 처리 중 오류 발생: {error}"
@@ -928,62 +2773,128 @@ class BackendClient:
             st.error(error_msg)
         return error_msg
 
-# Main Application Page Logic
-def show_main_app(config, logger):
-    """Displays the main MyStudy interface"""   
-       
+# Chat Panel (fragment: 채팅 입력/응답 시 task 패널은 다시 그리지 않음)
+@st.fragment
+def show_chat_panel(config, logger, viewport_height, session_store, task_placeholders):
+    """Chat history, input and streaming as an independently rerunnable fragment"""
+
     def on_submit():
         """채팅 입력 제출 시 호출되는 콜백 함수"""
         st.session_state.is_streaming = True
-    
-    # Initialize session
-    SessionManager.initialize_session(logger)
 
-    # Get viewport height
-    latest_detected_height = st.session_state.get("viewport_height", 800)
-    viewport_height = UI.calculate_viewport_height(latest_detected_height)
+    chat_container = st.container(border=True, height=max(viewport_height - 60, 400))
+    response_status = st.status("에이전트 응답 완료", state="complete")
 
-    # Create layout
-    chat_container, task_placeholders, response_status = UI.create_layout(viewport_height)
-    
     # Create helper classes
-    message_renderer = MessageRenderer(chat_container, task_placeholders, logger)
-    backend_client = BackendClient(config.backend_url, chat_container, task_placeholders, response_status)
+    render_cache = get_render_cache(config.render_cache_max_bytes)
+    message_renderer = MessageRenderer(chat_container, task_placeholders, logger, render_cache)
+    admission = get_stream_admission(config.max_concurrent_streams, config.stream_queue_max, config.stream_queue_timeout)
+    breaker = get_circuit_breaker(config.backend_url, **config.breaker_options)
+    transport = ReplayTransport(config.stream_replay_file, config.stream_replay_speed) if config.stream_replay_file else None
+    backend_client = BackendClient(
+        config.backend_url, chat_container, task_placeholders, response_status, admission, breaker,
+        transport=transport, record_dir=config.stream_record_dir,
+    )
+
+    # 이전 대화는 요청 시에만 저장소에서 불러옴
+    if st.session_state.get("history_has_more", False):
+        with chat_container:
+            if st.button("⬆️ 이전 대화 불러오기", key="load_older_messages", use_container_width=True):
+                SessionManager.load_older_messages(session_store, config.history_page_size)
+                rerun_fragment()
 
-    # Render existing task lists
-    TaskUI.render_task_lists(task_placeholders, backend_client)
-    
     # Render existing messages
     for message in st.session_state.messages:
         message_renderer.render_message(message, viewport_height)
 
-    # Chat input
-    prompt = st.chat_input(
-        "예: '수능특강 1단원부터 5단원까지 1주일 계획 짜줘'",
-        disabled=st.session_state.is_streaming,
-        on_submit=on_submit
-    )
+    # 이 fragment의 rerun으로 바뀐 상태만 저장 (전체 실행은 show_main_app 끝에서 1회 저장)
+    SessionManager.checkpoint_if_changed(session_store)
+
+    # Chat input (fragment/column 안에서도 화면 하단에 고정되도록 st.bottom에 배치)
+    read_only = backend_client.is_read_only()
+    with st.bottom:
+        prompt = st.chat_input(
+            "백엔드 복구 대기 중 (읽기 전용 모드)" if read_only else "예: '수능특강 1단원부터 5단원까지 1주일 계획 짜줘'",
+            disabled=st.session_state.is_streaming or read_only,
+            on_submit=on_submit
+        )
     
     # pending_message 처리 (학습 완료 버튼에서 온 메시지)
+    idempotency_key = None
     if st.session_state.get("pending_message"):
         prompt = st.session_state.pending_message
         st.session_state.pending_message = None  # 메시지 처리 후 삭제
+        pending_action = st.session_state.get("pending_action")
+        st.session_state.pending_action = None
+        if pending_action:
+            idempotency_key = RequestCoalescer.make_key(
+                st.session_state.session_id, pending_action["action"], pending_action["date"]
+            )
         
+    # 진도 문의는 로컬 통계로 즉시 답변 (LLM 호출 없음)
+    if prompt and not idempotency_key and st.session_state.task_list and StudyAnalytics.is_progress_question(prompt):
+        SessionManager.add_message("user", prompt)
+        SessionManager.add_message("assistant", StudyAnalytics.progress_answer(StudyAnalytics.compute()))
+        st.session_state.is_streaming = False
+        logger.info("progress question answered locally", extra={
+            "event": "local_answer", "session_id": st.session_state.session_id,
+        })
+        rerun_fragment()
+
     # Process prompt
     if prompt:
         st.session_state.is_streaming = True
-        logger.info(f"session_id: {st.session_state.session_id}, user prompt: \n{prompt}")
-        # Add user message
-        SessionManager.add_message("user", prompt)
-        message_renderer.render_message({"role": "user", "content": prompt}, viewport_height)
+        logger.info("user prompt", extra={
+            "event": "user_prompt", "session_id": st.session_state.session_id, "body": prompt,
+        })
+
+        def submit():
+            # 스트리밍 중 중단 후 재제출된 경우 같은 사용자 메시지를 다시 추가하지 않음
+            messages = st.session_state.messages
+            if not (idempotency_key and messages and messages[-1] == {"role": "user", "content": prompt}):
+                SessionManager.add_message("user", prompt)
+                message_renderer.render_message({"role": "user", "content": prompt}, viewport_height)
+            return backend_client.send_message(
+                prompt, st.session_state.session_id, viewport_height,
+                idempotency_key=idempotency_key, coalescer=coalescer,
+            )
 
         # Send to backend
         try:
-            response = backend_client.send_message(prompt, st.session_state.session_id, viewport_height)
-            SessionManager.add_message("assistant", response)
+            coalescer = get_request_coalescer(config.idempotency_window) if idempotency_key else None
+            if coalescer:
+                response, reused = coalescer.run(
+                    idempotency_key, submit, cacheable=lambda result: isinstance(result, dict),
+                    on_wait=lambda: response_status.update(label="이전 요청 처리 중…", state="running"),
+                )
+            else:
+                response, reused = submit(), False
+
+            attached = False
+            if reused and isinstance(response, dict):
+                # 중단된 요청을 백그라운드에서 이어받은 결과는 아직 이 세션에 반영되지 않았음
+                assistant = {"messages": response["messages"]}
+                messages = st.session_state.messages
+                attached = not (messages and messages[-1] == {"role": "assistant", "content": assistant})
+
+            if reused:
+                response_status.update(label="응답 완료", state="complete")
+            if attached:
+                backend_client.apply_stream_updates(response.get("updates", {}))
+                SessionManager.add_message("assistant", assistant)
+                logger.info(f"resubmission attached to interrupted stream (key: {idempotency_key})", extra={
+                    "event": "attached", "session_id": st.session_state.session_id,
+                })
+            elif reused:
+                logger.info(f"duplicate submission coalesced (key: {idempotency_key})", extra={
+                    "event": "coalesced", "session_id": st.session_state.session_id,
+                })
+                st.toast("이미 처리 중이거나 완료된 요청입니다.", icon="♻️")
+            else:
+                SessionManager.add_message("assistant", response)
             st.session_state.is_streaming = False
             
-            # 스트리밍 중 task update가 있었다면 이제 rerun
+            # 스트리밍 중 task update가 있었다면 task 패널까지 전체 rerun
             if st.session_state.get("needs_rerun_after_stream", False):
                 st.session_state.needs_rerun_after_stream = False
                 st.rerun()
@@ -991,16 +2902,53 @@ def show_main_app(config, logger):
             logger.error(f"백엔드 호출 중 오류 발생: {e}")
             st.error(f"오류가 발생했습니다: {e}")
 
-        st.rerun()
+        rerun_fragment()
+
+# Main Application Page Logic
+def show_main_app(config, logger):
+    """Displays the main MyStudy interface"""   
+    
+    # Initialize session
+    SessionManager.initialize_session(logger)
+    session_store = get_session_store(config.session_store_backend, config.session_store_path)
+    breaker = get_circuit_breaker(config.backend_url, **config.breaker_options)
+    SessionSnapshot.restore(breaker, session_store, config.history_page_size, logger)
+
+    # Get viewport height
+    latest_detected_height = st.session_state.get("viewport_height", 800)
+    viewport_height = UI.calculate_viewport_height(latest_detected_height)
+
+    # Create layout
+    chat_column, task_placeholders, dashboard_placeholder = UI.create_layout(viewport_height)
+
+    # Render existing task lists (날짜별 fragment, task 패널은 백엔드 URL만 사용)
+    task_client = BackendClient(config.backend_url, None, task_placeholders, None, breaker=breaker)
+    write_queue = get_task_write_queue(
+        config.task_write_batch_window, config.task_write_max_attempts, config.task_write_concurrency, breaker
+    )
+    TaskUI.render_task_lists(task_placeholders, task_client, session_store, write_queue)
+    if dashboard_placeholder is not None:
+        with dashboard_placeholder.container():
+            TaskUI.render_dashboard_fragment()
+            TaskUI.render_page_index(PageRangeIndex.for_plan(st.session_state.task_list))
+
+    # Chat panel
+    with chat_column:
+        show_chat_panel(config, logger, viewport_height, session_store, task_placeholders)
+
+    # 변경된 상태를 브라우저/서버 저장소에 저장 (새로고침, 재시작 시 복원용, 전체 실행당 1회)
+    SessionManager.checkpoint(session_store)
 
 # Application Entry Point
 def main():
     """Main application entry point"""
     config = Config()
-    logger = setup_logging()
+    logger = setup_logging(config)
 
     UI.setup_page_config(config)
     UI.add_custom_css()
+    BrowserStorage.load()
+    TabStorage.load()
     UI.create_sidebar(config, logger)
 
     pages = [
@@ -0,0 +1,53 @@
+"""Replay benchmark for app_main.py
+
+Feeds a recorded /chat/stream log (see STREAM_RECORD_DIR) through the app
+with streamlit's AppTest, with no backend, and reports the time to process
+each replayed response and the cost of a plain rerun as the history grows.
+
+    STREAM_RECORD_DIR=recordings streamlit run app_main.py   # record
+    python benchmarks/replay_benchmark.py recordings/<log>.jsonl.gz --turns 10
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def timed_run(app):
+    start = time.perf_counter()
+    app.run()
+    if app.exception:
+        raise RuntimeError(app.exception[0].message)
+    return (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("log", help="recorded stream log (.jsonl or .jsonl.gz)")
+    parser.add_argument("--turns", type=int, default=5, help="replayed responses per benchmark")
+    parser.add_argument("--reruns", type=int, default=3, help="plain reruns measured after each turn")
+    parser.add_argument("--speed", type=float, default=0, help="1 = original pacing, N = N times faster, 0 = no waiting")
+    args = parser.parse_args()
+
+    os.environ["STREAM_REPLAY_FILE"] = os.path.abspath(args.log)
+    os.environ["STREAM_REPLAY_SPEED"] = str(args.speed)
+    os.environ.setdefault("SESSION_STORE_BACKEND", "none")
+
+    from streamlit.testing.v1 import AppTest
+
+    app = AppTest.from_file(os.path.join(ROOT, "app_main.py"), default_timeout=600)
+    timed_run(app)
+
+    print(f"{'turn':>4} {'response (ms)':>14} {'rerun (ms)':>11}")
+    for turn in range(1, args.turns + 1):
+        app.session_state["pending_message"] = f"replay {turn}"
+        response_ms = timed_run(app)
+        rerun_ms = statistics.median(timed_run(app) for _ in range(args.reruns))
+        print(f"{turn:>4} {response_ms:>14.1f} {rerun_ms:>11.1f}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
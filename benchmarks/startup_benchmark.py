@@ -0,0 +1,63 @@
+"""Startup benchmark for app_main.py
+
+Imports app_main in fresh interpreters and reports import time and peak RSS,
+with lazy imports (current) versus the heavy dependencies imported eagerly
+at module top (pandas, requests, st_screen_stats) as before.
+
+    python benchmarks/startup_benchmark.py --runs 5
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHILD = """
+import json, resource, sys, time
+sys.path.insert(0, {root!r})
+start = time.perf_counter()
+{preload}
+import app_main
+elapsed = time.perf_counter() - start
+print(json.dumps({{"seconds": elapsed, "max_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss}}))
+"""
+
+VARIANTS = {
+    "lazy": "",
+    "eager": "import pandas, requests, st_screen_stats",
+}
+
+
+def run_variant(preload, runs):
+    samples = []
+    for _ in range(runs):
+        out = subprocess.run(
+            [sys.executable, "-c", CHILD.format(root=ROOT, preload=preload)],
+            capture_output=True, text=True, check=True, cwd=ROOT,
+        )
+        samples.append(json.loads(out.stdout.strip().splitlines()[-1]))
+    return {
+        "median_ms": statistics.median(s["seconds"] for s in samples) * 1000,
+        "max_rss_mb": max(s["max_rss_kb"] for s in samples) / 1024,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    results = {name: run_variant(preload, args.runs) for name, preload in VARIANTS.items()}
+    print(f"{'variant':<8} {'import (ms)':>12} {'peak RSS (MB)':>14}")
+    for name, result in results.items():
+        print(f"{name:<8} {result['median_ms']:>12.1f} {result['max_rss_mb']:>14.1f}")
+    saved_ms = results["eager"]["median_ms"] - results["lazy"]["median_ms"]
+    saved_mb = results["eager"]["max_rss_mb"] - results["lazy"]["max_rss_mb"]
+    print(f"\nlazy imports save {saved_ms:.1f} ms and {saved_mb:.1f} MB per process at startup")
+
+
+if __name__ == "__main__":
+    main()
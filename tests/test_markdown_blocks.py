@@ -0,0 +1,24 @@
+from app_main import MarkdownBlocks, RenderCache
+
+
+def test_large_table_stays_markdown():
+    rows = "\n".join(f"| {n} | {n * 2} |" for n in range(30))
+    text = f"요약\n\n| a | b |\n|---|---|\n{rows}\n\n끝"
+    assert MarkdownBlocks.parse(text) == [("markdown", text)]
+
+
+def test_mermaid_fence_is_split_out():
+    text = "앞\n```mermaid\ngraph TD\nA-->B\n```\n뒤"
+    assert MarkdownBlocks.parse(text) == [
+        ("markdown", "앞"),
+        ("mermaid", "graph TD\nA-->B"),
+        ("markdown", "뒤"),
+    ]
+
+
+def test_render_cache_reuses_parsed_blocks():
+    cache = RenderCache(max_bytes=1024)
+    text = "```mermaid\ngraph TD\nA-->B\n```"
+    first = cache.blocks(text)
+    assert cache.blocks(text) is first
+    assert (cache.hits, cache.misses) == (1, 1)
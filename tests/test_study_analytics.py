@@ -0,0 +1,52 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+import app_main
+from app_main import StudyAnalytics
+
+
+def day(offset):
+    return (datetime.now() + timedelta(days=offset)).strftime("%Y-%m-%d")
+
+
+def task(date_str, task_no, completed):
+    return {"date": date_str, "task_no": task_no, "start_pg": 1, "end_pg": 10, "is_completed": completed}
+
+
+@pytest.fixture
+def session_state(monkeypatch):
+    state = {}
+    monkeypatch.setattr(app_main.st, "session_state", state)
+    return state
+
+
+def test_streaks_counts_trailing_run():
+    flags = app_main.np.array([True, False, True, True])
+    assert StudyAnalytics._streaks(flags) == (2, 2)
+
+
+def test_streaks_empty():
+    assert StudyAnalytics._streaks(app_main.np.array([], dtype=bool)) == (0, 0)
+
+
+def test_current_streak_ignores_future_days(session_state):
+    # 오늘까지 3일 모두 완료, 이후 3일은 아직 미완료인 진행 중 계획
+    session_state["task_list"] = [task(day(offset), 1, offset <= 0) for offset in range(-2, 4)]
+    result = StudyAnalytics.compute()
+    assert result["current_streak"] == 3
+    assert result["best_streak"] == 3
+    assert "연속 달성 3일" in StudyAnalytics.summary_line(result)
+
+
+def test_current_streak_broken_by_missed_past_day(session_state):
+    session_state["task_list"] = [
+        task(day(-2), 1, True),
+        task(day(-1), 1, False),
+        task(day(0), 1, True),
+        task(day(1), 1, False),
+    ]
+    result = StudyAnalytics.compute()
+    assert result["current_streak"] == 1
+    assert result["best_streak"] == 1
+    assert result["backlog"][-1] == 1